@@ -12,20 +12,30 @@ const path = require('path');
 // Sökväg till profil-mappen
 const PROFILES_DIR = path.join(__dirname, '..', 'modbus-profiles');
 
+// Förkompilerad cache från compile-profiles.py
+const COMPILED_FILENAME = 'profiles.compiled.json';
+const COMPILED_FORMAT = 1;
+
 /**
- * Parsar en CSV-rad till ett objekt
+ * Delar en CSV-rad i fält. Fält inom citattecken får innehålla komma,
+ * och "" inom citattecken är ett citattecken (som import-profiles.py skriver).
  * @param {string} line - CSV-rad
- * @param {string[]} headers - Kolumnnamn
- * @returns {Object} Parsad rad som objekt
+ * @returns {string[]} Fält utan omgivande blanksteg
  */
-function parseCSVLine(line, headers) {
+function splitCSVLine(line) {
     const values = [];
     let current = '';
     let inQuotes = false;
     
-    for (let char of line) {
+    for (let i = 0; i < line.length; i++) {
+        const char = line[i];
         if (char === '"') {
-            inQuotes = !inQuotes;
+            if (inQuotes && line[i + 1] === '"') {
+                current += '"';
+                i++;
+            } else {
+                inQuotes = !inQuotes;
+            }
         } else if (char === ',' && !inQuotes) {
             values.push(current.trim());
             current = '';
@@ -35,6 +45,18 @@ function parseCSVLine(line, headers) {
     }
     values.push(current.trim());
     
+    return values;
+}
+
+/**
+ * Parsar en CSV-rad till ett objekt
+ * @param {string} line - CSV-rad
+ * @param {string[]} headers - Kolumnnamn
+ * @returns {Object} Parsad rad som objekt
+ */
+function parseCSVLine(line, headers) {
+    const values = splitCSVLine(line);
+    
     const obj = {};
     headers.forEach((header, i) => {
         obj[header] = values[i] || '';
@@ -82,6 +104,38 @@ function getRegisterType(fc) {
     }
 }
 
+/**
+ * Bygger profilobjektet (grupper och lookup-tabeller) från typade parametrar
+ * @param {Object[]} parameters - Typade parametrar
+ * @param {string} filePath - Sökväg till CSV-filen
+ * @returns {Object} Profildata
+ */
+function buildProfile(parameters, filePath) {
+    // Extrahera controller-namn från första parametern
+    const controllerName = parameters.length > 0 ? parameters[0].controller : 'UNKNOWN';
+    
+    return {
+        controller: controllerName,
+        fileName: path.basename(filePath),
+        filePath: filePath,
+        parameterCount: parameters.length,
+        parameters: parameters,
+        // Gruppera parametrar efter typ
+        byType: {
+            temperatures: parameters.filter(p => p.unit === '°C' || p.unit === 'K'),
+            pressures: parameters.filter(p => p.unit === 'bar' || p.unit === 'psi'),
+            booleans: parameters.filter(p => p.isBoolean),
+            setpoints: parameters.filter(p => p.isWritable && !p.isBoolean),
+            readonly: parameters.filter(p => !p.isWritable && !p.isBoolean)
+        },
+        // Lookup-tabeller för snabb åtkomst
+        byTag: Object.fromEntries(parameters.map(p => [p.tag, p])),
+        byRegister: Object.fromEntries(parameters.map(p => [p.register, p])),
+        byParamName: Object.fromEntries(parameters.map(p => [p.param_name, p])),
+        loadedAt: new Date().toISOString()
+    };
+}
+
 /**
  * Läser en enskild CSV-fil och returnerar profildata
  * @param {string} filePath - Sökväg till CSV-fil
@@ -96,7 +150,7 @@ async function readProfileCSV(filePath) {
             throw new Error('CSV-filen måste ha minst header + 1 rad');
         }
         
-        const headers = lines[0].split(',').map(h => h.trim());
+        const headers = splitCSVLine(lines[0].replace(/^\uFEFF/, ''));
         const parameters = [];
         
         for (let i = 1; i < lines.length; i++) {
@@ -107,37 +161,52 @@ async function readProfileCSV(filePath) {
             }
         }
         
-        // Extrahera controller-namn från första parametern
-        const controllerName = parameters.length > 0 ? parameters[0].controller : 'UNKNOWN';
-        
-        return {
-            controller: controllerName,
-            fileName: path.basename(filePath),
-            filePath: filePath,
-            parameterCount: parameters.length,
-            parameters: parameters,
-            // Gruppera parametrar efter typ
-            byType: {
-                temperatures: parameters.filter(p => p.unit === '°C' || p.unit === 'K'),
-                pressures: parameters.filter(p => p.unit === 'bar' || p.unit === 'psi'),
-                booleans: parameters.filter(p => p.isBoolean),
-                setpoints: parameters.filter(p => p.isWritable && !p.isBoolean),
-                readonly: parameters.filter(p => !p.isWritable && !p.isBoolean)
-            },
-            // Lookup-tabeller för snabb åtkomst
-            byTag: Object.fromEntries(parameters.map(p => [p.tag, p])),
-            byRegister: Object.fromEntries(parameters.map(p => [p.register, p])),
-            byParamName: Object.fromEntries(parameters.map(p => [p.param_name, p])),
-            loadedAt: new Date().toISOString()
-        };
+        return buildProfile(parameters, filePath);
     } catch (error) {
         console.error(`Fel vid läsning av ${filePath}:`, error.message);
         throw error;
     }
 }
 
+/**
+ * Läser den förkompilerade cachen om den matchar CSV-filerna i mappen.
+ * Cachen gäller bara om exakt samma CSV-filer finns med samma storlek
+ * och mtime som när compile-profiles.py körde.
+ * @param {string[]} csvFiles - CSV-filer i profil-mappen
+ * @returns {Promise<Object|null>} { profiles, errors } eller null om inaktuell
+ */
+async function readCompiledProfiles(csvFiles) {
+    let compiled;
+    try {
+        compiled = JSON.parse(await fs.readFile(path.join(PROFILES_DIR, COMPILED_FILENAME), 'utf8'));
+    } catch {
+        return null;
+    }
+    
+    const sources = compiled.sources || {};
+    if (compiled.format !== COMPILED_FORMAT || Object.keys(sources).length !== csvFiles.length) {
+        return null;
+    }
+    
+    for (const file of csvFiles) {
+        const stamp = sources[file];
+        if (!stamp) return null;
+        const stat = await fs.stat(path.join(PROFILES_DIR, file));
+        if (stat.size !== stamp.size || Math.floor(stat.mtimeMs) !== stamp.mtimeMs) {
+            return null;
+        }
+    }
+    
+    const profiles = {};
+    for (const [name, p] of Object.entries(compiled.profiles || {})) {
+        profiles[name] = buildProfile(p.parameters, path.join(PROFILES_DIR, p.fileName));
+    }
+    return { profiles: profiles, errors: compiled.errors || [] };
+}
+
 /**
  * Läser alla CSV-profiler från profil-mappen
+ * Använder den förkompilerade cachen när den är aktuell.
  * @returns {Promise<Object>} Alla profiler indexerade på controller-namn
  */
 async function loadAllProfiles() {
@@ -158,6 +227,18 @@ async function loadAllProfiles() {
         const files = await fs.readdir(PROFILES_DIR);
         const csvFiles = files.filter(f => f.toLowerCase().endsWith('.csv'));
         
+        const cached = await readCompiledProfiles(csvFiles);
+        if (cached) {
+            console.log(`OPUS: Laddade ${Object.keys(cached.profiles).length} profiler från ${COMPILED_FILENAME}`);
+            return {
+                profiles: cached.profiles,
+                errors: cached.errors,
+                count: Object.keys(cached.profiles).length,
+                fromCache: true,
+                loadedAt: new Date().toISOString()
+            };
+        }
+        
         console.log(`OPUS: Hittade ${csvFiles.length} CSV-profiler`);
         
         for (const file of csvFiles) {
@@ -238,6 +319,28 @@ function findParameter(profile, searchTerm) {
     return null;
 }
 
+/**
+ * Konverterar en registeradress i Modbus-konvention (40001, 30001, 10001)
+ * till 0-baserad adress
+ * @param {number} register - Registeradress från profilen
+ * @returns {number} 0-baserad adress
+ */
+function registerAddress(register) {
+    if (register >= 40001) return register - 40001;
+    if (register >= 30001) return register - 30001;
+    if (register >= 10001) return register - 10001;
+    return register;
+}
+
+/**
+ * Antal 16-bitars register som en datatyp upptar
+ * @param {string} datatype - Datatyp från profilen
+ * @returns {number} 1 eller 2
+ */
+function registerCount(datatype) {
+    return ['int32', 'uint32', 'float'].includes(datatype) ? 2 : 1;
+}
+
 /**
  * Genererar Modbus-read konfiguration för node-red-contrib-modbus
  * @param {Object} param - Parameter från profil
@@ -245,17 +348,8 @@ function findParameter(profile, searchTerm) {
  * @returns {Object} Konfiguration för modbus-read nod
  */
 function generateModbusReadConfig(param, unitId = 1) {
-    // Konvertera register-adress till 0-baserad
-    let address = param.register;
-    if (address >= 40001) address -= 40001;
-    else if (address >= 30001) address -= 30001;
-    else if (address >= 10001) address -= 10001;
-    
-    // Bestäm quantity baserat på datatyp
-    let quantity = 1;
-    if (['int32', 'uint32', 'float'].includes(param.datatype)) {
-        quantity = 2;
-    }
+    const address = registerAddress(param.register);
+    const quantity = registerCount(param.datatype);
     
     return {
         name: param.description || param.param_name,
@@ -272,6 +366,177 @@ function generateModbusReadConfig(param, unitId = 1) {
     };
 }
 
+// ============================================================================
+// CONTROLLER INDEX - förberäknad klassning Kylar/Frysar
+// ============================================================================
+
+/**
+ * Tolkar ett börvärde till tal ("4 °C", "-22,5", 4 → 4, 4, -22.5)
+ * @param {*} value - Börvärde som tal eller sträng
+ * @returns {number} Börvärdet, eller NaN om det inte går att tolka
+ */
+function parseSetpoint(value) {
+    if (typeof value === 'number') return value;
+    if (value === null || value === undefined || value === '') return NaN;
+    return parseFloat(value.toString().replace(',', '.').replace(/[^0-9.-]/g, ''));
+}
+
+/**
+ * Returnerar kategori för ett börvärde (samma regel som showKylar/showFrysar)
+ * @param {number} setpoint - Numeriskt börvärde
+ * @returns {string|null} 'Kylar', 'Frysar' eller null om okänt
+ */
+function categoryForSetpoint(setpoint) {
+    if (isNaN(setpoint)) return null;
+    return setpoint >= 0 ? 'Kylar' : 'Frysar';
+}
+
+/**
+ * Hämtar rått börvärde från en regulator. Saknas det räknas det som '0',
+ * precis som `(c.setpoint || '0')` i flödenas fallback-filter, så att
+ * indexet och filtren alltid sorterar en regulator likadant.
+ * @param {Object} ctrl - Regulator från reflink.regulators
+ * @returns {*} Rått börvärde
+ */
+function rawSetpoint(ctrl) {
+    return ctrl.setpoint || '0';
+}
+
+/**
+ * Nyckel för en regulator i index.byId. Regulatorer utan id, deviceId,
+ * name eller namn får sin position i listan ('#3') så att de aldrig delar
+ * nyckel med varandra.
+ * @param {Object} ctrl - Regulator från reflink.regulators
+ * @param {number} idx - Position i reflink.regulators
+ * @returns {string} Nyckel
+ */
+function controllerKey(ctrl, idx) {
+    for (const field of ['id', 'deviceId', 'name', 'namn']) {
+        if (ctrl[field] !== undefined && ctrl[field] !== null && ctrl[field] !== '') {
+            return String(ctrl[field]);
+        }
+    }
+    return '#' + idx;
+}
+
+/**
+ * Skapar en typad indexpost för en regulator
+ * @param {Object} ctrl - Regulator från reflink.regulators
+ * @param {Object} allProfiles - Alla laddade profiler (kan vara tomt)
+ * @param {number} idx - Position i reflink.regulators
+ * @returns {Object} Indexpost
+ */
+function classifyController(ctrl, allProfiles = {}, idx = 0) {
+    const raw = rawSetpoint(ctrl);
+    const setpoint = parseSetpoint(raw);
+    const model = ctrl.typ || ctrl.model || '';
+
+    return {
+        id: controllerKey(ctrl, idx),
+        model: model,
+        profile: allProfiles[model] ? model : null,
+        rawSetpoint: raw,
+        setpoint: setpoint,
+        category: categoryForSetpoint(setpoint),
+        controller: ctrl
+    };
+}
+
+/**
+ * Bygger om partitionerna kylar/frysar från index.all (bevarar ordningen)
+ * @param {Object} index - Controller-index
+ */
+function rebuildPartitions(index) {
+    index.kylar = [];
+    index.frysar = [];
+    for (const entry of index.all) {
+        if (entry.category === 'Kylar') index.kylar.push(entry.controller);
+        else if (entry.category === 'Frysar') index.frysar.push(entry.controller);
+    }
+}
+
+/**
+ * Bygger ett controller-index med numeriskt börvärde, kategori och modell
+ * per regulator, samt färdiga partitioner för showKylar/showFrysar.
+ * Tolkningen görs en gång här istället för i varje meddelande.
+ * @param {Object[]} regulators - reflink.regulators
+ * @param {Object} allProfiles - Alla laddade profiler (kan vara tomt)
+ * @returns {Object} Index: { all, byId, kylar, frysar, version, builtAt }
+ */
+function buildControllerIndex(regulators, allProfiles = {}) {
+    const all = (regulators || []).map((c, idx) => classifyController(c, allProfiles, idx));
+    const index = {
+        all: all,
+        byId: Object.fromEntries(all.map(e => [e.id, e])),
+        kylar: [],
+        frysar: [],
+        version: 1,
+        builtAt: new Date().toISOString()
+    };
+    rebuildPartitions(index);
+    return index;
+}
+
+/**
+ * Synkar ett befintligt index mot en ny poll av reflink.regulators.
+ * Poster vars råa börvärde och modell inte ändrats tolkas inte om.
+ * @param {Object|null} index - Befintligt index (eller null)
+ * @param {Object[]} regulators - Nya reflink.regulators
+ * @param {Object} allProfiles - Alla laddade profiler (kan vara tomt)
+ * @returns {Object} Uppdaterat (eller nytt) index
+ */
+function syncControllerIndex(index, regulators, allProfiles = {}) {
+    if (!index || !index.byId) {
+        return buildControllerIndex(regulators, allProfiles);
+    }
+
+    const all = (regulators || []).map((ctrl, idx) => {
+        const prev = index.byId[controllerKey(ctrl, idx)];
+        if (prev && prev.rawSetpoint === rawSetpoint(ctrl) && prev.model === (ctrl.typ || ctrl.model || '')) {
+            prev.controller = ctrl;
+            return prev;
+        }
+        return classifyController(ctrl, allProfiles, idx);
+    });
+
+    index.all = all;
+    index.byId = Object.fromEntries(all.map(e => [e.id, e]));
+    rebuildPartitions(index);
+    index.version++;
+    return index;
+}
+
+/**
+ * Uppdaterar börvärdet för en regulator efter en skrivning.
+ * Flyttar regulatorn mellan kylar/frysar om kategorin ändras.
+ * @param {Object} index - Controller-index
+ * @param {string} id - Regulatorns id
+ * @param {*} newSetpoint - Nytt börvärde
+ * @returns {boolean} true om regulatorn fanns och börvärdet gick att tolka
+ */
+function updateControllerSetpoint(index, id, newSetpoint) {
+    const entry = index && index.byId[String(id)];
+    if (!entry) return false;
+
+    const setpoint = parseSetpoint(newSetpoint);
+    if (isNaN(setpoint)) return false;
+    const category = categoryForSetpoint(setpoint);
+
+    // Behåll regulatorns format ("4 °C" eller 4)
+    const raw = typeof entry.controller.setpoint === 'string' ? `${setpoint} °C` : setpoint;
+    entry.rawSetpoint = raw;
+    entry.setpoint = setpoint;
+    entry.controller.setpoint = raw;
+    if (entry.controller.live) entry.controller.live.setpoint = setpoint;
+
+    if (entry.category !== category) {
+        entry.category = category;
+        rebuildPartitions(index);
+    }
+    index.version++;
+    return true;
+}
+
 // Exportera funktioner
 module.exports = {
     loadAllProfiles,
@@ -280,6 +545,13 @@ module.exports = {
     getProfile,
     findParameter,
     generateModbusReadConfig,
+    registerAddress,
+    registerCount,
+    parseSetpoint,
+    controllerKey,
+    buildControllerIndex,
+    syncControllerIndex,
+    updateControllerSetpoint,
     PROFILES_DIR
 };
 
@@ -0,0 +1,83 @@
+/**
+ * Reflink OS - Modbus Simulator
+ *
+ * Minnesbaserad transport för ModbusWriteQueue (modbusWriteQueue.js).
+ * Varje transaktion tar latencyMs + perRegisterMs per register, ungefär
+ * som en seriell RS-485-buss, så att skrivstrategier kan jämföras utan
+ * riktiga regulatorer.
+ */
+
+const sleep = ms => (ms > 0 ? new Promise(resolve => setTimeout(resolve, ms)) : Promise.resolve());
+
+class ModbusSimulator {
+    /**
+     * @param {Object} options - { latencyMs, perRegisterMs, failRate }
+     */
+    constructor(options = {}) {
+        this.latencyMs = options.latencyMs !== undefined ? options.latencyMs : 15;
+        this.perRegisterMs = options.perRegisterMs !== undefined ? options.perRegisterMs : 0.5;
+        // Andel skrivningar som "tappas" (för att prova tillbakaläsning)
+        this.failRate = options.failRate || 0;
+        this.units = new Map();
+        this.transactions = 0;
+        this.byFunctionCode = {};
+    }
+
+    _unit(bus, unitId) {
+        const key = `${bus}:${unitId}`;
+        if (!this.units.has(key)) {
+            this.units.set(key, { holding: new Map(), coil: new Map() });
+        }
+        return this.units.get(key);
+    }
+
+    async _transaction(fc, quantity) {
+        this.transactions++;
+        this.byFunctionCode[fc] = (this.byFunctionCode[fc] || 0) + 1;
+        await sleep(this.latencyMs + this.perRegisterMs * quantity);
+    }
+
+    _store(space, bus, unitId, address, values) {
+        if (this.failRate > 0 && Math.random() < this.failRate) return;
+        const table = this._unit(bus, unitId)[space];
+        values.forEach((v, i) => table.set(address + i, v));
+    }
+
+    _load(space, bus, unitId, address, quantity, empty) {
+        const table = this._unit(bus, unitId)[space];
+        return Array.from({ length: quantity }, (_, i) =>
+            table.has(address + i) ? table.get(address + i) : empty);
+    }
+
+    async writeRegister(bus, unitId, address, value) {
+        await this._transaction(6, 1);
+        this._store('holding', bus, unitId, address, [value]);
+    }
+
+    async writeRegisters(bus, unitId, address, values) {
+        await this._transaction(16, values.length);
+        this._store('holding', bus, unitId, address, values);
+    }
+
+    async readHoldingRegisters(bus, unitId, address, quantity) {
+        await this._transaction(3, quantity);
+        return this._load('holding', bus, unitId, address, quantity, 0);
+    }
+
+    async writeCoil(bus, unitId, address, value) {
+        await this._transaction(5, 1);
+        this._store('coil', bus, unitId, address, [value]);
+    }
+
+    async writeCoils(bus, unitId, address, values) {
+        await this._transaction(15, values.length);
+        this._store('coil', bus, unitId, address, values);
+    }
+
+    async readCoils(bus, unitId, address, quantity) {
+        await this._transaction(1, quantity);
+        return this._load('coil', bus, unitId, address, quantity, false);
+    }
+}
+
+module.exports = { ModbusSimulator };
@@ -0,0 +1,117 @@
+/**
+ * Reflink OS - Modbus Write Benchmark
+ *
+ * Jämför naiva skrivningar (en FC6 + tillbakaläsning per värde, i tur och
+ * ordning) med ModbusWriteQueue mot den lokala simulatorn. Scenariot är en
+ * typisk bulkändring från dashboarden: nya avfrostningsparametrar och
+ * larmgränser på alla AK-PC-781 på en buss, plus en slider som skickar
+ * flera börvärden i rad innan användaren släpper den.
+ *
+ * Användning:
+ *   npm run bench:modbus
+ *   node backend/modbusWriteBench.js --units 40 --latency 15 --interval 0
+ */
+
+const { loadAllProfiles, getProfile } = require('./modbusProfiles');
+const { ModbusWriteQueue } = require('./modbusWriteQueue');
+const { ModbusSimulator } = require('./modbusSimulator');
+
+function parseArgs(argv) {
+    const args = { units: 40, latency: 15, perRegister: 0.5, interval: 0, sliderSteps: 5 };
+    for (let i = 0; i < argv.length; i += 2) {
+        const value = Number(argv[i + 1]);
+        switch (argv[i]) {
+            case '--units': args.units = value; break;
+            case '--latency': args.latency = value; break;
+            case '--per-register': args.perRegister = value; break;
+            case '--interval': args.interval = value; break;
+            case '--slider-steps': args.sliderSteps = value; break;
+        }
+    }
+    return args;
+}
+
+/**
+ * Bygger listan med skrivningar i den ordning dashboarden skickar dem
+ */
+function buildScenario(profile, args) {
+    const writes = [];
+    const p = tag => profile.byTag[tag];
+
+    for (let unitId = 1; unitId <= args.units; unitId++) {
+        // Slidern skickar mellanvärden innan slutvärdet
+        for (let step = 0; step < args.sliderSteps; step++) {
+            writes.push({ unitId, param: p('SP'), value: -18 - step * 0.5 });
+        }
+        writes.push({ unitId, param: p('DEF_INT'), value: 480 });
+        writes.push({ unitId, param: p('DEF_DUR'), value: 25 });
+        writes.push({ unitId, param: p('ALM_HI'), value: -12 });
+        writes.push({ unitId, param: p('ALM_LO'), value: -30 });
+    }
+    return writes;
+}
+
+async function runNaive(writes, args) {
+    const sim = new ModbusSimulator({ latencyMs: args.latency, perRegisterMs: args.perRegister });
+    // Kön utan fördröjning, sammanslagning eller batchning = en skrivning åt gången
+    const queue = new ModbusWriteQueue(sim, {
+        flushDelayMs: 0,
+        minIntervalMs: args.interval,
+        maxRegistersPerWrite: 1
+    });
+
+    const started = Date.now();
+    for (const w of writes) {
+        await queue.enqueue(Object.assign({ bus: 'rs485-1' }, w));
+    }
+    return { elapsedMs: Date.now() - started, sim, queue };
+}
+
+async function runBatched(writes, args) {
+    const sim = new ModbusSimulator({ latencyMs: args.latency, perRegisterMs: args.perRegister });
+    const queue = new ModbusWriteQueue(sim, { minIntervalMs: args.interval });
+
+    const started = Date.now();
+    await Promise.all(writes.map(w => queue.enqueue(Object.assign({ bus: 'rs485-1' }, w))));
+    return { elapsedMs: Date.now() - started, sim, queue };
+}
+
+function report(label, writes, result) {
+    const seconds = result.elapsedMs / 1000;
+    const fcs = Object.entries(result.sim.byFunctionCode)
+        .map(([fc, n]) => `FC${fc}×${n}`).join(' ');
+    console.log(`\n${label}`);
+    console.log(`  Tid:             ${result.elapsedMs} ms`);
+    console.log(`  Skrivningar/s:   ${(writes.length / seconds).toFixed(1)} (${writes.length} begärda)`);
+    console.log(`  Transaktioner:   ${result.sim.transactions} (${fcs})`);
+    console.log(`  Sammanslagna:    ${result.queue.stats.coalesced}`);
+    console.log(`  Verifierade fel: ${result.queue.stats.verifyFailures}`);
+}
+
+async function main() {
+    const args = parseArgs(process.argv.slice(2));
+    const { profiles } = await loadAllProfiles();
+    const profile = getProfile('AK-PC-781', profiles);
+    if (!profile) {
+        console.error('❌ Hittade inte profilen AK-PC-781');
+        process.exit(1);
+    }
+
+    const writes = buildScenario(profile, args);
+    console.log(`📊 ${args.units} enheter, ${writes.length} skrivningar, ` +
+        `latens ${args.latency} ms + ${args.perRegister} ms/register, intervall ${args.interval} ms`);
+
+    const naive = await runNaive(writes, args);
+    report('Naivt (FC6 + tillbakaläsning per värde)', writes, naive);
+
+    const batched = await runBatched(writes, args);
+    report('ModbusWriteQueue (sammanslagning + FC16)', writes, batched);
+
+    console.log(`\n✅ ${(naive.elapsedMs / batched.elapsedMs).toFixed(1)}x snabbare, ` +
+        `${naive.sim.transactions - batched.sim.transactions} färre transaktioner`);
+}
+
+main().catch(error => {
+    console.error('❌', error.message);
+    process.exit(1);
+});
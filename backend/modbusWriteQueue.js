@@ -0,0 +1,378 @@
+/**
+ * Reflink OS - Modbus Write Queue
+ *
+ * Samlar skrivningar (setSetpoint, togglePower, bulkändringar från
+ * dashboarden) per buss och skickar dem som så få transaktioner som möjligt:
+ *
+ * - Upprepade skrivningar till samma register slås ihop (sista vinner)
+ * - Intilliggande holding-register slås ihop till en FC16-skrivning
+ *   (intilliggande coils till FC15)
+ * - Transaktioner på samma buss körs i tur och ordning med minsta intervall
+ * - Varje skrivning bekräftas genom att registren läses tillbaka
+ *
+ * Kön pratar med bussen via en transport med följande metoder (t.ex. en
+ * wrapper runt modbus-serial, eller ModbusSimulator i modbusSimulator.js):
+ *
+ *   writeRegister(bus, unitId, address, value)       FC6
+ *   writeRegisters(bus, unitId, address, values)     FC16
+ *   readHoldingRegisters(bus, unitId, address, qty)  FC3  → number[]
+ *   writeCoil(bus, unitId, address, value)           FC5
+ *   writeCoils(bus, unitId, address, values)         FC15
+ *   readCoils(bus, unitId, address, qty)             FC1  → boolean[]
+ */
+
+const { findParameter, registerAddress } = require('./modbusProfiles');
+
+const DEFAULT_OPTIONS = {
+    // Väntetid innan kön töms, så att en bulkändring hinner samlas ihop
+    flushDelayMs: 20,
+    // Minsta tid mellan två transaktioner på samma buss
+    minIntervalMs: 50,
+    // Max register per FC16 (protokollgräns 123) och coils per FC15 (1968)
+    maxRegistersPerWrite: 123,
+    maxCoilsPerWrite: 1968,
+    // Läs tillbaka och jämför efter varje skrivning
+    verify: true,
+    // Antal omförsök om tillbakaläsningen inte stämmer
+    retries: 1
+};
+
+// Strängar som dashboarden och msg.payload skickar för av/på
+const BOOLEAN_STRINGS = {
+    'true': true, '1': true, 'on': true, 'på': true,
+    'false': false, '0': false, 'off': false, 'av': false
+};
+
+/**
+ * Tolkar ett av/på-värde - strängen "false" ska bli 0, inte 1
+ * @param {Object} param - Parameter från profil
+ * @param {boolean|number|string} value - Värde från dashboard/flöde
+ * @returns {boolean}
+ */
+function parseBoolean(param, value) {
+    if (typeof value === 'boolean') return value;
+    if (typeof value === 'number' && (value === 0 || value === 1)) return value === 1;
+    if (typeof value === 'string') {
+        const parsed = BOOLEAN_STRINGS[value.trim().toLowerCase()];
+        if (parsed !== undefined) return parsed;
+    }
+    throw new Error(`Ogiltigt av/på-värde för ${param.param_name}: ${value}`);
+}
+
+/**
+ * Kodar ett värde i teknisk enhet till 16-bitars register enligt profilen
+ * @param {Object} param - Parameter från profil (datatype, scale)
+ * @param {number|boolean} value - Värde i teknisk enhet (t.ex. 4.5 °C)
+ * @returns {number[]} Registervärden (0-65535), big-endian för 32-bit
+ */
+function encodeValue(param, value) {
+    if (param.isBoolean || param.datatype === 'bool') {
+        return [parseBoolean(param, value) ? 1 : 0];
+    }
+
+    const numeric = Number(value);
+    if (!isFinite(numeric)) {
+        throw new Error(`Ogiltigt värde för ${param.param_name}: ${value}`);
+    }
+
+    if (param.datatype === 'float') {
+        const buf = Buffer.alloc(4);
+        buf.writeFloatBE(numeric / (param.scale || 1));
+        return [buf.readUInt16BE(0), buf.readUInt16BE(2)];
+    }
+
+    const raw = Math.round(numeric / (param.scale || 1));
+    const ranges = {
+        int16: [-32768, 32767],
+        uint16: [0, 65535],
+        int32: [-2147483648, 2147483647],
+        uint32: [0, 4294967295]
+    };
+    const [min, max] = ranges[param.datatype] || ranges.int16;
+    if (raw < min || raw > max) {
+        throw new Error(`${param.param_name}: ${value} ligger utanför ${param.datatype}`);
+    }
+
+    if (param.datatype === 'int32' || param.datatype === 'uint32') {
+        const unsigned = raw < 0 ? raw + 4294967296 : raw;
+        return [Math.floor(unsigned / 65536), unsigned % 65536];
+    }
+    return [raw < 0 ? raw + 65536 : raw];
+}
+
+/**
+ * Delar sorterade skrivningar i sammanhängande körningar
+ * @param {Object[]} writes - Skrivningar sorterade på address
+ * @param {number} maxLength - Max antal register/coils per körning
+ * @returns {Object[][]} Körningar
+ */
+function buildRuns(writes, maxLength) {
+    const runs = [];
+    let run = [];
+    let runEnd = -1;
+    let runLength = 0;
+
+    for (const w of writes) {
+        const adjacent = run.length > 0 && w.address === runEnd;
+        if (!adjacent || runLength + w.words.length > maxLength) {
+            if (run.length > 0) runs.push(run);
+            run = [];
+            runLength = 0;
+        }
+        run.push(w);
+        runLength += w.words.length;
+        runEnd = w.address + w.words.length;
+    }
+    if (run.length > 0) runs.push(run);
+
+    return runs;
+}
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+class ModbusWriteQueue {
+    /**
+     * @param {Object} transport - Se beskrivningen överst i filen
+     * @param {Object} options - Se DEFAULT_OPTIONS
+     */
+    constructor(transport, options = {}) {
+        this.transport = transport;
+        this.options = Object.assign({}, DEFAULT_OPTIONS, options);
+        this.buses = new Map();
+        this.stats = {
+            enqueued: 0,
+            coalesced: 0,
+            transactions: 0,
+            registersWritten: 0,
+            verifyFailures: 0,
+            retries: 0
+        };
+    }
+
+    /**
+     * Lägger en skrivning i kön
+     * @param {Object} write - { bus, unitId, param, value }
+     * @returns {Promise<Object>} Löses när skrivningen bekräftats
+     */
+    enqueue({ bus = 'default', unitId = 1, param, value }) {
+        if (!param || !(param.isWritable || (param.rw || '').includes('w'))) {
+            return Promise.reject(new Error(`Parametern ${param ? param.param_name : '?'} är inte skrivbar`));
+        }
+        // Bara coils (fc 1) och holding-register (fc 3) går att skriva -
+        // fc 2/4 skulle annars hamna på fel adress bland holding-registren
+        if (param.fc !== 1 && param.fc !== 3) {
+            return Promise.reject(new Error(`${param.param_name}: fc ${param.fc} går inte att skriva (bara fc 1 och 3)`));
+        }
+
+        let words;
+        try {
+            words = encodeValue(param, value);
+        } catch (error) {
+            return Promise.reject(error);
+        }
+
+        const state = this._bus(bus);
+        const space = param.fc === 1 ? 'coil' : 'holding';
+        const address = registerAddress(param.register);
+        const key = `${unitId}:${space}:${address}`;
+        this.stats.enqueued++;
+
+        return new Promise((resolve, reject) => {
+            const existing = state.pending.get(key);
+            const waiter = { resolve, reject, enqueuedAt: Date.now() };
+            if (existing) {
+                // Sista skrivningen vinner - tidigare väntare får samma resultat
+                existing.value = value;
+                existing.words = words;
+                existing.waiters.push(waiter);
+                this.stats.coalesced++;
+            } else {
+                state.pending.set(key, { bus, unitId, space, address, param, value, words, waiters: [waiter] });
+            }
+            this._schedule(bus);
+        });
+    }
+
+    /**
+     * Skriver en parameter från en profil, sökt på tag, param_name eller register
+     * @param {Object} profile - Profil från loadAllProfiles()
+     * @param {string} searchTerm - T.ex. 'SP', 'defrost_interval' eller '40002'
+     * @param {number|boolean} value - Värde i teknisk enhet
+     * @param {Object} target - { bus, unitId }
+     * @returns {Promise<Object>} Löses när skrivningen bekräftats
+     */
+    setParameter(profile, searchTerm, value, target = {}) {
+        const param = findParameter(profile, searchTerm);
+        if (!param) {
+            return Promise.reject(new Error(`Hittade inte ${searchTerm} i ${profile ? profile.controller : 'profilen'}`));
+        }
+        return this.enqueue({ bus: target.bus, unitId: target.unitId, param, value });
+    }
+
+    /**
+     * Tömmer kön direkt utan att vänta på flushDelayMs
+     * @param {string} [bus] - Bara denna buss (standard: alla)
+     * @returns {Promise<void>}
+     */
+    async flush(bus) {
+        const buses = bus === undefined ? [...this.buses.keys()] : [bus];
+        await Promise.all(buses.map(b => this._drain(b)));
+    }
+
+    _bus(bus) {
+        if (!this.buses.has(bus)) {
+            this.buses.set(bus, { pending: new Map(), timer: null, draining: null, lastTxAt: 0 });
+        }
+        return this.buses.get(bus);
+    }
+
+    _schedule(bus) {
+        const state = this._bus(bus);
+        if (state.timer || state.draining) return;
+        state.timer = setTimeout(() => {
+            state.timer = null;
+            this._drain(bus);
+        }, this.options.flushDelayMs);
+    }
+
+    _drain(bus) {
+        const state = this._bus(bus);
+        if (state.timer) {
+            clearTimeout(state.timer);
+            state.timer = null;
+        }
+        if (state.draining) return state.draining;
+
+        state.draining = (async () => {
+            while (state.pending.size > 0) {
+                const batch = [...state.pending.values()];
+                state.pending.clear();
+                await this._writeBatch(state, batch);
+            }
+        })().finally(() => {
+            state.draining = null;
+            // enqueue() mellan loopens slut och här schemalade inget
+            if (state.pending.size > 0) this._schedule(bus);
+        });
+        return state.draining;
+    }
+
+    async _writeBatch(state, batch) {
+        // Gruppera per enhet och registertyp, sortera på adress
+        const groups = new Map();
+        for (const w of batch) {
+            const key = `${w.unitId}:${w.space}`;
+            if (!groups.has(key)) groups.set(key, []);
+            groups.get(key).push(w);
+        }
+
+        for (const writes of groups.values()) {
+            writes.sort((a, b) => a.address - b.address);
+            const maxLength = writes[0].space === 'coil'
+                ? this.options.maxCoilsPerWrite
+                : this.options.maxRegistersPerWrite;
+
+            for (const run of buildRuns(writes, maxLength)) {
+                await this._writeRun(state, run);
+            }
+        }
+    }
+
+    async _writeRun(state, run) {
+        const { bus, unitId, space } = run[0];
+        const address = run[0].address;
+        const words = run.flatMap(w => w.words);
+        let attempts = 0;
+        let verified = !this.options.verify;
+        let error = null;
+
+        while (attempts <= this.options.retries) {
+            attempts++;
+            try {
+                await this._rateLimit(state);
+                await this._transmit(bus, unitId, space, address, words);
+                this.stats.transactions++;
+                this.stats.registersWritten += words.length;
+
+                if (this.options.verify) {
+                    await this._rateLimit(state);
+                    verified = await this._verify(bus, unitId, space, address, words);
+                    if (!verified) {
+                        this.stats.verifyFailures++;
+                        error = new Error(`Tillbakaläsning stämmer inte (buss ${bus}, enhet ${unitId}, adress ${address})`);
+                    }
+                }
+                if (verified) {
+                    error = null;
+                    break;
+                }
+            } catch (e) {
+                error = e;
+            }
+            if (attempts <= this.options.retries) this.stats.retries++;
+        }
+
+        const now = Date.now();
+        for (const w of run) {
+            const result = {
+                bus, unitId,
+                register: w.param.register,
+                param: w.param.param_name,
+                value: w.value,
+                fc: this._functionCode(space, words.length),
+                batchSize: run.length,
+                attempts: attempts,
+                verified: verified
+            };
+            w.waiters.forEach((waiter, i) => {
+                if (error) {
+                    waiter.reject(error);
+                } else {
+                    waiter.resolve(Object.assign({}, result, {
+                        coalesced: i < w.waiters.length - 1,
+                        latencyMs: now - waiter.enqueuedAt
+                    }));
+                }
+            });
+        }
+    }
+
+    async _rateLimit(state) {
+        const wait = state.lastTxAt + this.options.minIntervalMs - Date.now();
+        if (wait > 0) await sleep(wait);
+        state.lastTxAt = Date.now();
+    }
+
+    _functionCode(space, length) {
+        if (space === 'coil') return length === 1 ? 5 : 15;
+        return length === 1 ? 6 : 16;
+    }
+
+    _transmit(bus, unitId, space, address, words) {
+        const t = this.transport;
+        if (space === 'coil') {
+            return words.length === 1
+                ? t.writeCoil(bus, unitId, address, words[0] === 1)
+                : t.writeCoils(bus, unitId, address, words.map(w => w === 1));
+        }
+        return words.length === 1
+            ? t.writeRegister(bus, unitId, address, words[0])
+            : t.writeRegisters(bus, unitId, address, words);
+    }
+
+    async _verify(bus, unitId, space, address, words) {
+        const t = this.transport;
+        const readBack = space === 'coil'
+            ? (await t.readCoils(bus, unitId, address, words.length)).map(v => (v ? 1 : 0))
+            : await t.readHoldingRegisters(bus, unitId, address, words.length);
+        return words.every((w, i) => readBack[i] === w);
+    }
+}
+
+module.exports = {
+    ModbusWriteQueue,
+    encodeValue,
+    parseBoolean,
+    buildRuns,
+    DEFAULT_OPTIONS
+};
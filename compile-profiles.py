@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Kompilerar Modbus CSV-profiler till en cache för snabb uppstart
+================================================================
+Läser alla CSV-filer i modbus-profiles/ och skriver profiles.compiled.json
+med färdigtypade parametrar. "OPUS - Ladda CSV-profiler" och profilmotorn
+läser cachen istället för att parsa om varje CSV vid uppstart.
+
+Cachen innehåller storlek och mtime för varje källfil. Ändras, läggs till
+eller tas någon CSV bort räknas cachen som inaktuell och CSV-filerna
+parsas som tidigare - en gammal cache ger alltså aldrig fel profiler.
+
+Användning:
+    python3 compile-profiles.py                         # /root/.node-red/modbus-profiles
+    python3 compile-profiles.py modbus-profiles
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+from datetime import datetime, timezone
+
+DEFAULT_PROFILES_DIR = '/root/.node-red/modbus-profiles'
+
+COMPILED_FILENAME = 'profiles.compiled.json'
+
+# Höjs om strukturen i cachen ändras - äldre cache ignoreras då
+COMPILED_FORMAT = 1
+
+REGISTER_TYPES = {
+    1: 'coil',
+    2: 'discrete_input',
+    3: 'holding_register',
+    4: 'input_register'
+}
+
+def js_int(value):
+    """Som JavaScripts parseInt(value) || 0"""
+    match = re.match(r'\s*([+-]?\d+)', value or '')
+    return int(match.group(1)) if match else 0
+
+def js_float(value):
+    """Som JavaScripts parseFloat(value) || 0"""
+    match = re.match(r'\s*([+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?)', value or '')
+    return float(match.group(1)) if match else 0.0
+
+def convert_param(row):
+    """Typar en CSV-rad - samma regler som convertTypes() i modbusProfiles.js"""
+    rw = row.get('rw') or 'r'
+    datatype = row.get('datatype') or 'int16'
+    fc = js_int(row.get('fc')) or 4
+    scale = js_float(row.get('scale')) or 1
+
+    return {
+        'controller': row.get('controller') or '',
+        'param_name': row.get('param_name') or '',
+        'description': row.get('description') or '',
+        'register': js_int(row.get('register')),
+        'fc': fc,
+        'datatype': datatype,
+        'scale': int(scale) if scale == int(scale) else scale,
+        'unit': row.get('unit') or '',
+        'tag': row.get('tag') or '',
+        'rw': rw,
+        'isWritable': 'w' in rw.lower(),
+        'isBoolean': (row.get('datatype') or '').lower() == 'bool',
+        'registerType': REGISTER_TYPES.get(fc, 'unknown')
+    }
+
+def read_profile_csv(filepath):
+    """Läser en profil-CSV och returnerar (controller, parametrar)"""
+    with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f, skipinitialspace=True)
+        reader.fieldnames = [h.strip() for h in (reader.fieldnames or [])]
+        params = []
+        for row in reader:
+            row = {k: (v or '').strip() for k, v in row.items() if k is not None}
+            param = convert_param(row)
+            if param['param_name'] and param['register'] > 0:
+                params.append(param)
+
+    if not params:
+        raise ValueError('CSV-filen måste ha minst header + 1 giltig rad')
+
+    return params[0]['controller'], params
+
+def source_stamp(filepath):
+    """Storlek och mtime (hela ms) - samma som Nodes Math.floor(stat.mtimeMs)"""
+    st = os.stat(filepath)
+    return {'size': st.st_size, 'mtimeMs': st.st_mtime_ns // 1_000_000}
+
+def compile_profiles(profiles_dir):
+    """Kompilerar alla CSV-profiler i profiles_dir till ett cache-objekt"""
+    files = sorted(f for f in os.listdir(profiles_dir) if f.lower().endswith('.csv'))
+
+    compiled = {
+        'format': COMPILED_FORMAT,
+        'compiledAt': datetime.now(timezone.utc).isoformat(),
+        'sources': {},
+        'profiles': {},
+        'errors': []
+    }
+
+    for filename in files:
+        filepath = os.path.join(profiles_dir, filename)
+        compiled['sources'][filename] = source_stamp(filepath)
+        try:
+            controller, params = read_profile_csv(filepath)
+        except (OSError, ValueError, csv.Error) as e:
+            compiled['errors'].append({'file': filename, 'error': str(e)})
+            continue
+
+        compiled['profiles'][controller] = {
+            'controller': controller,
+            'fileName': filename,
+            'parameterCount': len(params),
+            'parameters': params
+        }
+
+    return compiled
+
+def write_compiled(profiles_dir, compiled):
+    """Skriver cachen atomiskt så att Node-RED aldrig läser en halv fil"""
+    target = os.path.join(profiles_dir, COMPILED_FILENAME)
+    tmp = target + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(compiled, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, target)
+    return target
+
+def main():
+    profiles_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PROFILES_DIR
+
+    print(f"📂 Kompilerar profiler i {profiles_dir}...")
+    try:
+        compiled = compile_profiles(profiles_dir)
+    except FileNotFoundError:
+        print(f"❌ Hittade inte {profiles_dir}")
+        return 1
+
+    for name, profile in compiled['profiles'].items():
+        print(f"  ✏️ {name} ({profile['parameterCount']} parametrar) från {profile['fileName']}")
+    for error in compiled['errors']:
+        print(f"  ⚠️ {error['file']}: {error['error']}")
+
+    target = write_compiled(profiles_dir, compiled)
+    print(f"✅ Sparade {target} ({len(compiled['profiles'])} profiler)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Reflink Flow Bench
+==================
+Kör function-noderna i flows-filerna offline, utan Node-RED, och mäter
+vad de kostar per meddelande.
+
+- Extraherar function-noder och deras wires ur en eller flera flows-filer
+- Kör dem i en lokal Node-subprocess med stubbade global/flow/context/node
+- Spelar upp inspelade eller syntetiska meddelanden genom wire-grafen
+- Rapporterar latens-percentiler (p50/p95/p99) och ungefärliga
+  allokeringar (heapUsed-delta) per nod
+
+Syntetisk ström (standard): inject-noder med "once" körs först som
+uppstart, sedan triggas alla inject-noder en gång per iteration.
+Inspelad ström: JSONL med en rad per meddelande, {"node": "<id|namn>", "msg": {...}}.
+
+Användning:
+    python3 flow-bench.py flows.json
+    python3 flow-bench.py flows.json --entry "refboard data" -n 1000
+    python3 flow-bench.py flows.json --messages inspelning.jsonl --json bench.json
+    python3 flow-bench.py flows.json --baseline bench.json --max-regression 1.25
+
+Med --baseline blir skriptet en regressionsgrind: exit-kod 1 om någon nods
+p95 ökat mer än --max-regression gånger (och mer än --min-delta-us).
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+# Nodtyper som bara skickar vidare meddelandet
+PASS_THROUGH_TYPES = ('link in', 'link out', 'junction')
+
+# Repots motsvarighet till modulerna i functionGlobalContext
+GLOBAL_MODULES = {
+    'profileEngine': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'modbusProfiles.js')
+}
+
+# ============================================================================
+# NODE RUNNER - körs i en Node-subprocess
+# ============================================================================
+
+RUNNER_JS = r'''// Reflink Flow Bench - runner
+// Läser ett jobb som JSON på stdin och skriver resultatet som JSON på stdout
+const v8 = require('v8');
+
+function readStdin() {
+    return new Promise(resolve => {
+        const chunks = [];
+        process.stdin.on('data', c => chunks.push(c));
+        process.stdin.on('end', () => resolve(Buffer.concat(chunks).toString('utf8')));
+    });
+}
+
+// Context med stöd för punkt-sökvägar, som Node-REDs get('reflink.regulators')
+function createContext(seed) {
+    const data = seed || {};
+    function walk(key, create) {
+        const parts = String(key).split('.');
+        let obj = data;
+        for (let i = 0; i < parts.length - 1; i++) {
+            if (obj[parts[i]] === undefined || obj[parts[i]] === null) {
+                if (!create) return [undefined, parts[parts.length - 1]];
+                obj[parts[i]] = {};
+            }
+            obj = obj[parts[i]];
+        }
+        return [obj, parts[parts.length - 1]];
+    }
+    return {
+        get(key, store, cb) {
+            if (typeof store === 'function') cb = store;
+            const [obj, last] = walk(key, false);
+            const value = obj === undefined ? undefined : obj[last];
+            if (cb) { cb(null, value); return; }
+            return value;
+        },
+        set(key, value, store, cb) {
+            if (typeof store === 'function') cb = store;
+            const [obj, last] = walk(key, true);
+            if (value === undefined) delete obj[last]; else obj[last] = value;
+            if (cb) cb(null);
+        },
+        keys(store, cb) {
+            if (typeof store === 'function') cb = store;
+            const k = Object.keys(data);
+            if (cb) { cb(null, k); return; }
+            return k;
+        }
+    };
+}
+
+function buildInjectMsg(cfg) {
+    const msg = { _msgid: Math.random().toString(16).slice(2) };
+    const props = cfg.props || [{ p: 'payload' }, { p: 'topic', vt: 'str' }];
+    for (const prop of props) {
+        let v = prop.p === 'payload' ? cfg.payload : (prop.p === 'topic' ? cfg.topic : prop.v);
+        const vt = prop.p === 'payload' ? cfg.payloadType : prop.vt;
+        switch (vt) {
+            case 'date': v = Date.now(); break;
+            case 'num': v = Number(v); break;
+            case 'bool': v = v === true || v === 'true'; break;
+            case 'json': try { v = JSON.parse(v || 'null'); } catch (e) { v = null; } break;
+            default: v = v === undefined ? '' : v;
+        }
+        msg[prop.p] = v;
+    }
+    return msg;
+}
+
+(async function main() {
+    const job = JSON.parse(await readStdin());
+    const AsyncFunction = Object.getPrototypeOf(async function () {}).constructor;
+    const ARGS = ['msg', 'node', 'context', 'flow', 'global', 'env', 'RED', 'util', 'Buffer', 'console',
+                  'setTimeout', 'clearTimeout', 'setInterval', 'clearInterval'];
+
+    // Samma moduler som functionGlobalContext i settings.js, där de finns
+    const globalSeed = Object.assign({ fs: require('fs'), path: require('path') }, job.globals || {});
+    for (const [name, modulePath] of Object.entries(job.modules || {})) {
+        globalSeed[name] = require(modulePath);
+    }
+    const globalCtx = createContext(globalSeed);
+    const flowCtx = {};
+    const stats = {};
+    const sinks = {};
+    const queue = [];
+    const RED = { util: { cloneMessage: m => structuredClone(m) } };
+    const env = { get: k => process.env[k] };
+
+    const nodes = {};
+    for (const [id, cfg] of Object.entries(job.nodes)) {
+        const n = { id, cfg };
+        if (cfg.type === 'function') {
+            stats[id] = { samples: [], heap: [], errors: 0, lastError: null };
+            n.context = createContext({});
+            n.flow = flowCtx[cfg.z] = flowCtx[cfg.z] || createContext({});
+            n.api = {
+                id, name: cfg.name, outputCount: cfg.outputs || 1,
+                status() {}, log() {}, trace() {}, debug() {},
+                warn() {}, error(e) { stats[id].errors++; stats[id].lastError = String(e); },
+                send(m) { route(id, m); }, done() {}
+            };
+            try {
+                n.fn = new Function(...ARGS, cfg.func || 'return msg;');
+            } catch (e) {
+                n.fn = new AsyncFunction(...ARGS, cfg.func || 'return msg;');
+            }
+        }
+        nodes[id] = n;
+    }
+
+    // Fördela en nods returvärde på dess utgångar (som Node-RED)
+    function route(id, result) {
+        const cfg = job.nodes[id];
+        if (result === null || result === undefined) return;
+        const outputs = Array.isArray(result) ? result : [result];
+        outputs.forEach((out, port) => {
+            if (out === null || out === undefined) return;
+            const targets = (cfg.wires || [])[port] || [];
+            const msgs = Array.isArray(out) ? out : [out];
+            for (const m of msgs) {
+                if (m === null || m === undefined) continue;
+                targets.forEach((t, i) => queue.push([t, i === 0 ? m : structuredClone(m)]));
+            }
+        });
+    }
+
+    async function deliver(id, msg) {
+        const n = nodes[id];
+        if (!n) { sinks[id] = (sinks[id] || 0) + 1; return; }
+        const cfg = n.cfg;
+        if (cfg.type === 'link out') {
+            (cfg.links || []).forEach(t => queue.push([t, msg]));
+            return;
+        }
+        if (cfg.type !== 'function') {
+            if (cfg.passThrough) route(id, msg); else sinks[id] = (sinks[id] || 0) + 1;
+            return;
+        }
+        const s = stats[id];
+        const heapBefore = process.memoryUsage().heapUsed;
+        const t0 = process.hrtime.bigint();
+        let result;
+        try {
+            result = n.fn(msg, n.api, n.context, n.flow, globalCtx, env, RED, RED.util, Buffer, console,
+                          setTimeout, clearTimeout, setInterval, clearInterval);
+            if (result && typeof result.then === 'function') result = await result;
+        } catch (e) {
+            s.errors++;
+            s.lastError = String(e && e.message || e);
+            result = null;
+        }
+        const t1 = process.hrtime.bigint();
+        const heapDelta = process.memoryUsage().heapUsed - heapBefore;
+        if (s.record) {
+            s.samples.push(Number(t1 - t0));
+            // Negativ delta = GC under anropet, säger inget om allokeringen
+            if (heapDelta >= 0) s.heap.push(heapDelta);
+        }
+        route(id, result);
+    }
+
+    async function drain() {
+        while (queue.length) {
+            const [id, msg] = queue.shift();
+            await deliver(id, msg);
+        }
+    }
+
+    function fire(step) {
+        const msg = step.msg ? structuredClone(step.msg) : buildInjectMsg(job.nodes[step.node] || {});
+        const cfg = job.nodes[step.node];
+        if (cfg && cfg.type === 'inject') route(step.node, msg);
+        else queue.push([step.node, msg]);
+    }
+
+    const setRecord = on => Object.values(stats).forEach(s => { s.record = on; });
+
+    const start = Date.now();
+    setRecord(false);
+    for (const step of job.startup || []) { fire(step); await drain(); }
+    for (let i = 0; i < (job.warmup || 0); i++) {
+        for (const step of job.sequence) { fire(step); await drain(); }
+    }
+    setRecord(true);
+    for (let i = 0; i < job.iterations; i++) {
+        for (const step of job.sequence) { fire(step); await drain(); }
+    }
+
+    for (const s of Object.values(stats)) delete s.record;
+    process.stdout.write(JSON.stringify({
+        nodeVersion: process.version,
+        heapLimit: v8.getHeapStatistics().heap_size_limit,
+        wallMs: Date.now() - start,
+        nodes: stats,
+        sinks
+    }));
+    process.exit(0);
+})().catch(e => {
+    process.stderr.write(String(e && e.stack || e));
+    process.exit(2);
+});
+'''
+
+# ============================================================================
+# FLÖDEN
+# ============================================================================
+
+def load_flows(filepath):
+    """Laddar flows från JSON-fil"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def extract_graph(flows):
+    """Plockar ut de noder runnern behöver: function-, inject- och länknoder
+
+    Övriga noder (widgets, debug, http response) blir sänkor; de tas med
+    med namn och typ så att rapporten kan visa vart meddelanden tog vägen.
+    """
+    graph = {}
+    for n in flows:
+        if not isinstance(n, dict) or 'id' not in n or n.get('type') in ('tab', 'subflow'):
+            continue
+
+        node_type = n.get('type')
+        entry = {
+            'type': node_type,
+            'name': n.get('name') or n.get('label') or '',
+            'z': n.get('z'),
+            'wires': n.get('wires', [])
+        }
+        if node_type == 'function':
+            entry['func'] = n.get('func', '')
+            entry['outputs'] = n.get('outputs', 1)
+        elif node_type == 'inject':
+            for key in ('props', 'payload', 'payloadType', 'topic', 'once'):
+                entry[key] = n.get(key)
+        elif node_type == 'link out':
+            entry['links'] = n.get('links', [])
+        if node_type in PASS_THROUGH_TYPES:
+            entry['passThrough'] = True
+        graph[n['id']] = entry
+
+    return graph
+
+def resolve_node(graph, ref):
+    """Slår upp en nod på id eller namn"""
+    if ref in graph:
+        return ref
+    matches = [node_id for node_id, n in graph.items() if n['name'] == ref]
+    if not matches:
+        raise KeyError(f"Hittade ingen nod med id eller namn '{ref}'")
+    if len(matches) > 1:
+        raise KeyError(f"Namnet '{ref}' är inte unikt ({', '.join(matches)}) - ange id")
+    return matches[0]
+
+def synthetic_sequence(graph, entries=None):
+    """Bygger uppstart + sekvens av inject-noder för en syntetisk ström"""
+    injects = [node_id for node_id, n in graph.items() if n['type'] == 'inject']
+    startup = [{'node': i} for i in injects if graph[i].get('once')]
+
+    if entries:
+        sequence = [{'node': resolve_node(graph, e)} for e in entries]
+    else:
+        sequence = [{'node': i} for i in injects]
+
+    return startup, sequence
+
+def recorded_sequence(graph, filepath):
+    """Läser en inspelad ström (JSONL) med {"node": ..., "msg": {...}} per rad"""
+    sequence = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'node' not in record:
+                raise ValueError(f"{filepath}:{line_no}: 'node' saknas")
+            sequence.append({'node': resolve_node(graph, record['node']), 'msg': record.get('msg', {})})
+    return sequence
+
+# ============================================================================
+# KÖRNING OCH RAPPORT
+# ============================================================================
+
+def run_job(job, node_bin='node'):
+    """Kör runnern i en Node-subprocess och returnerar resultatet"""
+    with tempfile.NamedTemporaryFile('w', suffix='.js', delete=False, encoding='utf-8') as f:
+        f.write(RUNNER_JS)
+        runner_path = f.name
+
+    try:
+        proc = subprocess.run(
+            [node_bin, runner_path],
+            input=json.dumps(job, ensure_ascii=False).encode('utf-8'),
+            capture_output=True
+        )
+    finally:
+        os.unlink(runner_path)
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"Node-runnern misslyckades:\n{proc.stderr.decode('utf-8', 'replace')}")
+
+    return json.loads(proc.stdout)
+
+def percentile(sorted_values, pct):
+    """Percentil med nearest-rank på en sorterad lista"""
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+def summarize(graph, result):
+    """Räknar fram percentiler och allokeringar per nod"""
+    summary = {}
+    for node_id, s in result['nodes'].items():
+        samples = sorted(s['samples'])
+        if not samples and not s['errors']:
+            continue
+        heap = s['heap']
+        summary[node_id] = {
+            'name': graph[node_id]['name'],
+            'calls': len(samples),
+            'p50_us': percentile(samples, 50) / 1000,
+            'p95_us': percentile(samples, 95) / 1000,
+            'p99_us': percentile(samples, 99) / 1000,
+            'max_us': (samples[-1] if samples else 0) / 1000,
+            'alloc_bytes': sum(heap) / len(heap) if heap else 0,
+            'errors': s['errors'],
+            'last_error': s['lastError']
+        }
+    return summary
+
+def print_report(summary, result):
+    print(f"⏱️  Node {result['nodeVersion']} • {result['wallMs']} ms totalt")
+    print()
+    print(f"{'Nod':<42} {'anrop':>7} {'p50 µs':>9} {'p95 µs':>9} {'p99 µs':>9} {'max µs':>9} {'alloc KB':>9}")
+    print("-" * 100)
+
+    for node_id, s in sorted(summary.items(), key=lambda kv: -kv[1]['p95_us']):
+        label = (s['name'] or node_id)[:40]
+        print(f"{label:<42} {s['calls']:>7} {s['p50_us']:>9.1f} {s['p95_us']:>9.1f} "
+              f"{s['p99_us']:>9.1f} {s['max_us']:>9.1f} {s['alloc_bytes'] / 1024:>9.1f}")
+        if s['errors']:
+            print(f"    ❌ {s['errors']} fel, senast: {s['last_error']}")
+
+def compare_baseline(summary, baseline, max_regression, min_delta_us):
+    """Returnerar noder vars p95 ökat mer än tillåtet jämfört med baseline"""
+    regressions = []
+    for node_id, s in summary.items():
+        before = baseline.get(node_id)
+        if not before or not before.get('p95_us'):
+            continue
+        ratio = s['p95_us'] / before['p95_us']
+        if ratio > max_regression and s['p95_us'] - before['p95_us'] > min_delta_us:
+            regressions.append((node_id, s['name'], before['p95_us'], s['p95_us'], ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarka function-noder offline')
+    parser.add_argument('flows', nargs='+', help='En eller flera flows-filer')
+    parser.add_argument('--entry', action='append', help='Inject-nod (id eller namn) att trigga; kan upprepas')
+    parser.add_argument('--messages', help='Inspelad ström (JSONL) istället för inject-noder')
+    parser.add_argument('--globals', help='JSON-fil med global context att starta med')
+    parser.add_argument('-n', '--iterations', type=int, default=200, help='Antal iterationer (standard 200)')
+    parser.add_argument('--warmup', type=int, default=20, help='Iterationer före mätning (standard 20)')
+    parser.add_argument('--json', help='Skriv resultatet som JSON (kan användas som --baseline)')
+    parser.add_argument('--baseline', help='Tidigare --json att jämföra mot')
+    parser.add_argument('--max-regression', type=float, default=1.25, help='Tillåten p95-ökning (standard 1.25x)')
+    parser.add_argument('--min-delta-us', type=float, default=20.0, help='Ignorera ökningar under detta (µs)')
+    parser.add_argument('--node-bin', default='node', help='Node-binär (standard: node)')
+    args = parser.parse_args()
+
+    flows = []
+    for filepath in args.flows:
+        flows.extend(load_flows(filepath))
+    graph = extract_graph(flows)
+
+    try:
+        startup, sequence = synthetic_sequence(graph, args.entry)
+        if args.messages:
+            sequence = recorded_sequence(graph, args.messages)
+    except (KeyError, ValueError) as e:
+        print(f"❌ {e}")
+        return 2
+
+    if not sequence:
+        print("⚠️ Inga meddelanden att spela upp")
+        return 2
+
+    globals_seed = {}
+    if args.globals:
+        with open(args.globals, 'r', encoding='utf-8') as f:
+            globals_seed = json.load(f)
+
+    fn_count = sum(1 for n in graph.values() if n['type'] == 'function')
+    print(f"📂 {fn_count} function-noder, {len(sequence)} meddelanden × {args.iterations} iterationer")
+
+    job = {
+        'nodes': graph,
+        'globals': globals_seed,
+        'modules': {name: path for name, path in GLOBAL_MODULES.items() if os.path.exists(path)},
+        'startup': startup,
+        'sequence': sequence,
+        'iterations': args.iterations,
+        'warmup': args.warmup
+    }
+
+    try:
+        result = run_job(job, args.node_bin)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ {e}")
+        return 2
+
+    summary = summarize(graph, result)
+    print_report(summary, result)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Sparade {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(summary, baseline, args.max_regression, args.min_delta_us)
+        if regressions:
+            print(f"\n❌ {len(regressions)} noder har blivit långsammare:")
+            for node_id, name, before, after, ratio in regressions:
+                print(f"   - {name or node_id}: p95 {before:.1f} → {after:.1f} µs ({ratio:.2f}x)")
+            return 1
+        print(f"\n✅ Ingen regression mot {args.baseline}")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+Importerar registerkartor från tillverkare till Modbus-profiler
+================================================================
+Läser en CSV- eller XLSX-export från tillverkaren, känner igen kolumnerna
+(t.ex. "Address", "Adresse", "Function code", "Data type", "Faktor"),
+validerar alla rader och skriver normaliserade profil-CSV:er till
+modbus-profiles/ samt en ny profiles.compiled.json (se compile-profiles.py).
+
+Filen läses rad för rad och valideras i ett svep. Överlapp hittas via ett
+index på (controller, fc, adress) för varje register en parameter upptar,
+så även registerkartor med tusentals rader går snabbt. Varje fel anges med
+radnummer i källfilen.
+
+Kontroller:
+    - register och fc stämmer (1xxxx = fc 2, 3xxxx = fc 4, 4xxxx = fc 3)
+    - känd datatyp och rw, skrivbara register bara på fc 1/3
+    - inga överlappande register (int32/uint32/float upptar två)
+    - unika param_name och tag per regulator
+
+Användning:
+    python3 import-profiles.py export.csv --controller AK-CC-550 --vendor danfoss
+    python3 import-profiles.py export.xlsx --sheet Modbus --controller XR60CX
+    python3 import-profiles.py export.csv --controller X --check          # bara validera
+    python3 import-profiles.py export.csv --controller X --skip-invalid   # hoppa över felaktiga rader
+
+Exit-kod: 0 = importerad, 1 = valideringsfel (inget skrivs), 2 = fel
+"""
+
+import os
+import re
+import sys
+import csv
+import argparse
+import importlib.util
+
+DEFAULT_PROFILES_DIR = '/root/.node-red/modbus-profiles'
+
+# Kolumnordning i profilerna - samma som modbus-profiles/README.md
+PROFILE_COLUMNS = ('controller', 'param_name', 'description', 'register', 'fc',
+                   'datatype', 'scale', 'unit', 'tag', 'rw')
+
+# Rubriker som tillverkarna använder, normaliserade med normalize_header()
+COLUMN_SYNONYMS = {
+    'controller': ('controller', 'regulator', 'model', 'modell', 'device', 'enhet typ'),
+    'param_name': ('param name', 'parameter name', 'parameter', 'param', 'name', 'namn',
+                   'variable', 'variabel', 'symbol'),
+    'description': ('description', 'beskrivning', 'beschreibung', 'descrizione', 'text',
+                    'comment', 'kommentar', 'label'),
+    'register': ('register', 'reg', 'address', 'adress', 'adresse', 'indirizzo',
+                 'modbus address', 'modbus register', 'register address', 'addr'),
+    'fc': ('fc', 'function code', 'function', 'funktionskod', 'register type', 'registertyp',
+           'type of register', 'object type'),
+    'datatype': ('datatype', 'data type', 'datatyp', 'format', 'type', 'typ', 'tipo'),
+    'scale': ('scale', 'scaling', 'skala', 'skalning', 'factor', 'faktor', 'multiplier',
+              'resolution', 'gain'),
+    'decimals': ('decimals', 'decimaler', 'decimal', 'dec', 'dp'),
+    'unit': ('unit', 'units', 'enhet', 'einheit', 'unita', 'eng unit'),
+    'tag': ('tag', 'code', 'kod', 'short name', 'kortnamn', 'mnemonic'),
+    'rw': ('rw', 'r w', 'access', 'åtkomst', 'read write', 'mode', 'zugriff', 'permission')
+}
+
+# Minsta kolumner för att en rad ska kunna bli en parameter
+REQUIRED_COLUMNS = ('register',)
+
+# Så många rader före rubrikraden tolereras (titlar, logotyp-rader i XLSX)
+HEADER_SCAN_ROWS = 20
+
+DATATYPE_SYNONYMS = {
+    'int16': ('int16', 'int', 'integer', 's16', 'sint16', 'short', 'signed', 'signed16', 'int 16'),
+    'uint16': ('uint16', 'uint', 'u16', 'word', 'unsigned', 'unsigned16', 'ushort', 'uint 16'),
+    'int32': ('int32', 's32', 'sint32', 'dint', 'long', 'signed32', 'int 32'),
+    'uint32': ('uint32', 'u32', 'udint', 'dword', 'ulong', 'unsigned32', 'uint 32'),
+    'float': ('float', 'float32', 'real', 'ieee754', 'single', 'float 32'),
+    'bool': ('bool', 'boolean', 'bit', 'digital', 'binary', 'coil')
+}
+
+RW_SYNONYMS = {
+    'r': ('r', 'ro', 'read', 'read only', 'readonly', 'r o', 'läs'),
+    'rw': ('rw', 'r w', 'wr', 'read write', 'readwrite', 'läs skriv'),
+    'w': ('w', 'wo', 'write', 'write only', 'writeonly', 'skriv')
+}
+
+FC_SYNONYMS = {
+    1: ('coil', 'coils', 'do', 'digital output'),
+    2: ('discrete input', 'discrete inputs', 'di', 'input status', 'digital input'),
+    3: ('holding', 'holding register', 'holding registers', 'hr'),
+    4: ('input register', 'input registers', 'ir')
+}
+
+# Registerområde (Modbus-konvention) -> function code
+REGISTER_RANGES = (
+    (10001, 19999, 2),
+    (30001, 39999, 4),
+    (40001, 49999, 3)
+)
+
+# Första registret per fc, för att räkna om 0-baserade adresser
+FC_OFFSETS = {1: 0, 2: 10001, 3: 40001, 4: 30001}
+
+WIDE_DATATYPES = ('int32', 'uint32', 'float')
+
+def normalize_header(value):
+    """'Function Code:' -> 'function code', 'R/W' -> 'r w'"""
+    text = re.sub(r'[^\wåäö]+', ' ', str(value or '').lower())
+    return ' '.join(text.replace('_', ' ').split())
+
+def _build_lookup(synonyms):
+    return {normalize_header(alias): key for key, aliases in synonyms.items() for alias in aliases}
+
+HEADER_LOOKUP = _build_lookup(COLUMN_SYNONYMS)
+DATATYPE_LOOKUP = _build_lookup(DATATYPE_SYNONYMS)
+RW_LOOKUP = _build_lookup(RW_SYNONYMS)
+FC_LOOKUP = _build_lookup(FC_SYNONYMS)
+
+class ProfileImportError(Exception):
+    """Fel som gör att hela filen inte kan importeras"""
+
+# ============================================================================
+# LÄSNING
+# ============================================================================
+
+def detect_encoding(filepath):
+    """UTF-8 (med eller utan BOM) eller Windows-1252 som äldre Excel skriver"""
+    with open(filepath, 'rb') as f:
+        sample = f.read(65536)
+    if sample.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    try:
+        sample.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Ett tecken kan vara avklippt i slutet av provet
+        if e.start < len(sample) - 3:
+            return 'cp1252'
+    return 'utf-8'
+
+def iter_csv_rows(filepath, delimiter=None):
+    """Strömmar (radnummer, fält) ur en CSV; avgränsaren (, ; tab |) gissas om
+    den inte anges. Radnumret är den fysiska rad där posten börjar, även när
+    ett citerat fält sträcker sig över flera rader.
+    """
+    encoding = detect_encoding(filepath)
+    with open(filepath, 'r', encoding=encoding, newline='') as f:
+        if not delimiter:
+            sample = f.read(16384)
+            f.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters=',;\t|').delimiter
+            except csv.Error:
+                delimiter = ','
+        reader = csv.reader(f, delimiter=delimiter)
+        line_no = 1
+        for row in reader:
+            yield line_no, row
+            line_no = reader.line_num + 1
+
+def iter_xlsx_rows(filepath, sheet=None):
+    """Strömmar (radnummer, fält) ur ett XLSX-blad (openpyxl i read_only-läge)"""
+    try:
+        import openpyxl
+    except ImportError:
+        raise ProfileImportError('XLSX kräver openpyxl: pip install openpyxl (eller exportera bladet som CSV)')
+
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        if sheet and sheet not in workbook.sheetnames:
+            raise ProfileImportError(f"Bladet '{sheet}' finns inte (finns: {', '.join(workbook.sheetnames)})")
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        for line_no, row in enumerate(worksheet.iter_rows(values_only=True), start=1):
+            yield line_no, [cell_text(cell) for cell in row]
+    finally:
+        workbook.close()
+
+def cell_text(value):
+    """Excel-celler som text - 40001.0 blir '40001'"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def iter_rows(filepath, sheet=None, delimiter=None):
+    """(radnummer, lista av strängar), oavsett filformat"""
+    if filepath.lower().endswith(('.xlsx', '.xlsm')):
+        return iter_xlsx_rows(filepath, sheet)
+    return iter_csv_rows(filepath, delimiter)
+
+def detect_columns(headers):
+    """Mappar rubriker till profilkolumner: {'register': 0, 'fc': 3, ...}
+
+    Exakt träff går före delträff ("Modbus address" -> register), och varje
+    profilkolumn tas av den första rubriken som matchar.
+    """
+    mapping = {}
+    for exact in (True, False):
+        for index, header in enumerate(headers):
+            name = normalize_header(header)
+            if not name or index in mapping.values():
+                continue
+            if exact:
+                column = HEADER_LOOKUP.get(name)
+            else:
+                column = next((HEADER_LOOKUP[alias] for alias in sorted(HEADER_LOOKUP, key=len, reverse=True)
+                               if len(alias) > 3 and re.search(rf'\b{re.escape(alias)}\b', name)), None)
+            if column and column not in mapping:
+                mapping[column] = index
+    return mapping
+
+def find_header(rows):
+    """Letar upp rubrikraden bland de första raderna
+
+    Returnerar (radnummer, rubriker, kolumnmappning). Raden med flest kända rubriker
+    vinner, och den måste innehålla en registerkolumn.
+    """
+    best = (0, None, {})
+    for line_no, row in rows:
+        mapping = detect_columns(row)
+        if all(c in mapping for c in REQUIRED_COLUMNS) and len(mapping) > len(best[2]):
+            best = (line_no, row, mapping)
+    if not best[2]:
+        raise ProfileImportError(f'Hittade ingen rubrikrad med registerkolumn bland de första {HEADER_SCAN_ROWS} raderna')
+    return best
+
+# ============================================================================
+# NORMALISERING
+# ============================================================================
+
+def parse_register(value):
+    """'40001', '0x9C41', '40 001' -> int, None om det inte går"""
+    text = str(value or '').strip().replace(' ', '')
+    if not text:
+        return None
+    try:
+        if text.lower().startswith('0x'):
+            return int(text, 16)
+        if text.lower().endswith('h') and re.fullmatch(r'[0-9a-fA-F]+h', text):
+            return int(text[:-1], 16)
+        number = float(text.replace(',', '.'))
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else None
+
+def parse_fc(value):
+    """'3', 'FC03', '0x03', 'Holding register' -> 3"""
+    text = normalize_header(value)
+    if not text:
+        return None
+    if text in FC_LOOKUP:
+        return FC_LOOKUP[text]
+    # '03 Read Holding Registers', 'FC 4 - Input'
+    match = re.match(r'(?:fc|0x)?\s*0*([1-4])\b', text)
+    if match:
+        return int(match.group(1))
+    for alias in sorted(FC_LOOKUP, key=len, reverse=True):
+        if len(alias) > 3 and re.search(rf'\b{re.escape(alias)}\b', text):
+            return FC_LOOKUP[alias]
+    return None
+
+def parse_scale(scale, decimals):
+    """'0.1', '0,1', '1/10', '/10', 'x0.1' eller antal decimaler -> float"""
+    text = str(scale or '').strip().lower().replace(',', '.').lstrip('x×*').strip()
+    if text:
+        match = re.fullmatch(r'(\d*\.?\d*)\s*/\s*(\d+\.?\d*)', text)
+        try:
+            if match:
+                return float(match.group(1) or 1) / float(match.group(2))
+            return float(text)
+        except (ValueError, ZeroDivisionError):
+            return None
+    text = str(decimals or '').strip()
+    if text:
+        try:
+            return 10 ** -int(float(text))
+        except ValueError:
+            return None
+    return 1.0
+
+def format_scale(scale):
+    """Skriver skalan som profilerna gör: 1, 0.1, 0.01"""
+    if scale == int(scale):
+        return str(int(scale))
+    return repr(round(scale, 10))
+
+def snake_case(text):
+    """'Börvärde temp. 1' -> 'borvarde_temp_1'"""
+    text = str(text or '').lower()
+    for src, dst in (('å', 'a'), ('ä', 'a'), ('ö', 'o'), ('ü', 'u'), ('é', 'e'), ('°', '')):
+        text = text.replace(src, dst)
+    return re.sub(r'[^a-z0-9]+', '_', text).strip('_')
+
+def fc_for_register(register):
+    for low, high, fc in REGISTER_RANGES:
+        if low <= register <= high:
+            return fc
+    return None
+
+def register_count(datatype):
+    """Antal 16-bitars register - samma som registerCount() i modbusProfiles.js"""
+    return 2 if datatype in WIDE_DATATYPES else 1
+
+# ============================================================================
+# VALIDERING
+# ============================================================================
+
+class ProfileImport:
+    """Normaliserar och validerar rader i ett svep
+
+    Överlapp och dubbletter slås upp i dict-index istället för att jämföra
+    varje rad mot alla andra.
+    """
+
+    def __init__(self, controller=None, zero_based=True):
+        self.controller = controller
+        self.zero_based = zero_based
+        self.profiles = {}
+        self.errors = []
+        self.skipped = 0
+        self.occupied = {}
+        self.names = {}
+        self.tags = {}
+
+    def error(self, line_no, message):
+        self.errors.append({'line': line_no, 'error': message})
+
+    def add_row(self, line_no, row, mapping):
+        """Normaliserar en källrad; returnerar parametern eller None"""
+        def get(column):
+            index = mapping.get(column)
+            if index is None or index >= len(row):
+                return ''
+            # Radbrytningar i cellen slås ihop - profilernas läsare i
+            # Node-RED delar filen på '\n' och skulle annars tappa raden
+            return ' '.join(str(row[index] or '').split())
+
+        raw_register = get('register')
+        name_source = get('param_name') or get('tag') or get('description')
+        if not raw_register and not name_source:
+            # Tomma rader och avsnittsrubriker i tillverkarens lista
+            self.skipped += 1
+            return None
+
+        errors_before = len(self.errors)
+        controller = self.controller or get('controller')
+        if not controller:
+            self.error(line_no, 'Saknar controller (ange --controller)')
+
+        register = parse_register(raw_register)
+        if register is None:
+            self.error(line_no, f"Ogiltigt register '{raw_register}'")
+
+        raw_fc = get('fc')
+        fc = parse_fc(raw_fc) if raw_fc else None
+        if raw_fc and fc is None:
+            self.error(line_no, f"Okänd function code '{raw_fc}'")
+
+        raw_datatype = get('datatype')
+        datatype = DATATYPE_LOOKUP.get(normalize_header(raw_datatype)) if raw_datatype else 'int16'
+        if datatype is None:
+            self.error(line_no, f"Okänd datatyp '{raw_datatype}'")
+
+        raw_rw = get('rw')
+        rw = RW_LOOKUP.get(normalize_header(raw_rw)) if raw_rw else None
+        if raw_rw and rw is None:
+            self.error(line_no, f"Okänd åtkomst '{raw_rw}'")
+
+        scale = parse_scale(get('scale'), get('decimals'))
+        if scale is None or scale <= 0:
+            self.error(line_no, f"Ogiltig skala '{get('scale') or get('decimals')}'")
+
+        if register is not None:
+            register, fc = self.resolve_register(line_no, register, fc)
+
+        if fc is not None and datatype:
+            if fc in (1, 2) and datatype != 'bool':
+                self.error(line_no, f'fc {fc} är bitar men datatypen är {datatype}')
+            if rw is None:
+                rw = 'rw' if fc in (1, 3) else 'r'
+            if 'w' in rw and fc in (2, 4):
+                self.error(line_no, f'{"Discrete input" if fc == 2 else "Input register"} {register} kan inte vara skrivbart ({rw})')
+
+        param_name = snake_case(get('param_name') or name_source)
+        if not param_name:
+            self.error(line_no, 'Saknar parameternamn')
+        tag = (get('tag') or param_name).strip().upper().replace(' ', '_')
+
+        if len(self.errors) > errors_before:
+            return None
+
+        if not self.check_unique(line_no, controller, register, fc, datatype, param_name, tag):
+            return None
+
+        param = {
+            'controller': controller,
+            'param_name': param_name,
+            'description': get('description') or get('param_name') or name_source,
+            'register': register,
+            'fc': fc,
+            'datatype': datatype,
+            'scale': format_scale(scale),
+            'unit': get('unit'),
+            'tag': tag,
+            'rw': rw
+        }
+        self.profiles.setdefault(controller, []).append(param)
+        return param
+
+    def resolve_register(self, line_no, register, fc):
+        """Kontrollerar registerområde mot fc och räknar om 0-baserade adresser"""
+        expected = fc_for_register(register)
+        if expected is not None:
+            if fc is None:
+                fc = expected
+            elif fc != expected:
+                self.error(line_no, f'Register {register} hör till fc {expected} men fc är {fc}')
+            return register, fc
+
+        if register >= 10000:
+            self.error(line_no, f'Register {register} ligger utanför Modbus-områdena')
+            return register, fc
+        if fc is None:
+            self.error(line_no, f'Adress {register} kräver fc (eller register i 1xxxx/3xxxx/4xxxx)')
+            return register, fc
+
+        # Adress i PDU-form (0-baserad) eller 1-baserad inom sitt område
+        address = register if self.zero_based else register - 1
+        if address < 0 or FC_OFFSETS[fc] + address == 0:
+            # Coils lagras 0-baserat som i registerAddress(), och profilerna kräver register > 0
+            self.error(line_no, f'Adress {register} kan inte lagras för fc {fc}')
+            return register, fc
+        return FC_OFFSETS[fc] + address, fc
+
+    def check_unique(self, line_no, controller, register, fc, datatype, param_name, tag):
+        """Indexerade kontroller av överlapp och dubbletter"""
+        ok = True
+        for offset in range(register_count(datatype)):
+            key = (controller, fc, register + offset)
+            other = self.occupied.get(key)
+            if other:
+                self.error(line_no, f'Register {register + offset} överlappar {other[1]} (rad {other[0]})')
+                ok = False
+        for index, key, label in ((self.names, param_name, 'param_name'), (self.tags, tag, 'tag')):
+            other = index.get((controller, key))
+            if other:
+                self.error(line_no, f"Dubblett {label} '{key}' (rad {other})")
+                ok = False
+        if ok:
+            for offset in range(register_count(datatype)):
+                self.occupied[(controller, fc, register + offset)] = (line_no, param_name)
+            self.names[(controller, param_name)] = line_no
+            self.tags[(controller, tag)] = line_no
+        return ok
+
+def import_file(filepath, controller=None, sheet=None, delimiter=None, zero_based=True):
+    """Läser och validerar en export; returnerar (ProfileImport, mapping, headers)"""
+    rows = iter_rows(filepath, sheet, delimiter)
+
+    # Buffra bara raderna fram till rubriken, resten strömmas
+    buffered = []
+    for line_no, row in rows:
+        buffered.append((line_no, row))
+        if len(buffered) >= HEADER_SCAN_ROWS:
+            break
+    header_line, headers, mapping = find_header(buffered)
+
+    result = ProfileImport(controller, zero_based)
+    if not controller and 'controller' not in mapping:
+        raise ProfileImportError('Exporten saknar controller-kolumn - ange --controller')
+
+    for line_no, row in buffered:
+        if line_no > header_line:
+            result.add_row(line_no, row, mapping)
+    for line_no, row in rows:
+        result.add_row(line_no, row, mapping)
+
+    return result, mapping, headers
+
+# ============================================================================
+# SKRIVNING
+# ============================================================================
+
+def profile_filename(controller, vendor=None):
+    """'AK-CC 550' + 'danfoss' -> 'danfoss_AK-CC_550.csv'"""
+    name = re.sub(r'[^\w.-]+', '_', controller).strip('_')
+    return f'{snake_case(vendor)}_{name}.csv' if vendor else f'{name}.csv'
+
+def write_profile_csv(filepath, params):
+    """Skriver en profil atomiskt; fält med komma/citattecken citeras"""
+    tmp = filepath + '.tmp'
+    with open(tmp, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=PROFILE_COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(params)
+    os.replace(tmp, filepath)
+
+def existing_controllers(profiles_dir, compiler):
+    """{controller: filnamn} för profilerna som redan finns i mappen"""
+    found = {}
+    for filename in sorted(os.listdir(profiles_dir)):
+        if filename.lower().endswith('.csv'):
+            try:
+                controller, _ = compiler.read_profile_csv(os.path.join(profiles_dir, filename))
+                found[controller] = filename
+            except (OSError, ValueError, csv.Error):
+                pass
+    return found
+
+def load_compiler():
+    """compile-profiles.py har bindestreck i namnet och laddas via importlib"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'compile-profiles.py')
+    spec = importlib.util.spec_from_file_location('compile_profiles', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def main():
+    parser = argparse.ArgumentParser(description='Importera registerkartor (CSV/XLSX) till Modbus-profiler')
+    parser.add_argument('source', help='Export från tillverkaren (.csv eller .xlsx)')
+    parser.add_argument('--controller', help='Regulatormodell (krävs om exporten saknar controller-kolumn)')
+    parser.add_argument('--vendor', help='Tillverkare, blir prefix i filnamnet (danfoss_AK-CC-550.csv)')
+    parser.add_argument('-o', '--output-dir', default=DEFAULT_PROFILES_DIR,
+                        help=f'Profilmappen (standard: {DEFAULT_PROFILES_DIR})')
+    parser.add_argument('--sheet', help='Blad i XLSX (standard: första)')
+    parser.add_argument('--delimiter', help='Avgränsare i CSV (standard: gissas)')
+    parser.add_argument('--one-based', action='store_true',
+                        help='Korta adresser (under 10000) är 1-baserade, inte PDU-adresser')
+    parser.add_argument('--check', action='store_true', help='Validera bara, skriv inget')
+    parser.add_argument('--skip-invalid', action='store_true', help='Hoppa över felaktiga rader istället för att avbryta')
+    parser.add_argument('--no-compile', action='store_true', help='Uppdatera inte profiles.compiled.json')
+    args = parser.parse_args()
+
+    print(f"📂 Läser {args.source}...")
+    try:
+        result, mapping, headers = import_file(args.source, args.controller, args.sheet,
+                                               args.delimiter, zero_based=not args.one_based)
+    except (OSError, csv.Error, ProfileImportError) as e:
+        print(f"❌ {e}")
+        return 2
+
+    print('  Kolumner: ' + ', '.join(f"{column} ← '{headers[index]}'" for column, index in mapping.items()))
+    total = sum(len(params) for params in result.profiles.values())
+    print(f"  {total} parametrar, {len(result.errors)} fel, {result.skipped} tomma rader")
+
+    for error in result.errors[:50]:
+        print(f"  ⚠️ rad {error['line']}: {error['error']}")
+    if len(result.errors) > 50:
+        print(f"  ... och {len(result.errors) - 50} fel till")
+
+    if result.errors and not args.skip_invalid:
+        print('❌ Inget skrevs - rätta felen eller kör med --skip-invalid')
+        return 1
+    if not result.profiles:
+        print('❌ Inga giltiga parametrar')
+        return 1
+    if args.check:
+        print('✅ Valideringen klar (--check, inget skrevs)')
+        return 0
+
+    compiler = load_compiler()
+    try:
+        os.makedirs(args.output_dir, exist_ok=True)
+        existing = existing_controllers(args.output_dir, compiler)
+        for controller, params in result.profiles.items():
+            # Finns regulatorn redan skrivs samma fil över - två filer med
+            # samma controller ger en profil som beror på filordningen
+            filename = existing.get(controller) or profile_filename(controller, args.vendor)
+            if controller in existing:
+                print(f"  ♻️ {controller} finns redan - uppdaterar {filename}")
+            write_profile_csv(os.path.join(args.output_dir, filename), params)
+            print(f"  ✏️ {controller} ({len(params)} parametrar) → {filename}")
+
+        if not args.no_compile:
+            compiled = compiler.compile_profiles(args.output_dir)
+            target = compiler.write_compiled(args.output_dir, compiled)
+            print(f"  ⚡ Uppdaterade {target}")
+    except OSError as e:
+        print(f"❌ {e}")
+        return 2
+
+    print(f"✅ Importerade {len(result.profiles)} profil(er) till {args.output_dir}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Reflink Flow Merge
+==================
+Trevägsmerge av Node-RED flödesfiler för utrullning till många siter.
+
+    base      = flödet som senast rullades ut till siten
+    local     = flödet som det ser ut på siten idag (lokala ändringar)
+    upstream  = nytt flöde från refactor-actions.py / repot
+
+Noder matchas på id och mergas fält för fält. `wires` mergas per utgång
+och textfält som `func` mergas rad för rad (diff3). Layout (x/y) är
+site-specifik och löses alltid till förmån för local. Övriga konflikter
+löses enligt --prefer och listas i konfliktrapporten.
+
+Matchning och fältmerge är linjär i antal noder - varje fil indexeras en
+gång på id. Radmergen körs bara för textfält som ändrats på båda sidor.
+
+Användning:
+    python3 merge-flows.py base.json local.json upstream.json -o merged.json
+    python3 merge-flows.py base.json local.json upstream.json --report konflikter.json
+
+Exit-kod: 0 = ren merge, 1 = konflikter (output skrivs ändå), 2 = fel
+"""
+
+import sys
+import json
+import difflib
+import argparse
+
+# Saknat värde (skiljer "fältet finns inte" från null)
+MISSING = object()
+
+# Fält där local alltid vinner - layout flyttas ofta för hand på siten
+LOCAL_WINS_FIELDS = ('x', 'y', 'w', 'h')
+
+# Textfält som mergas rad för rad
+TEXT_FIELDS = ('func', 'format', 'info', 'initialize', 'finalize', 'template')
+
+def load_flows(filepath):
+    """Laddar flows från JSON-fil"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def detect_format(filepath):
+    """Läser indrag och avslutande radbrytning så att output kan matcha"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        raw = f.read()
+
+    indent = 4
+    lines = raw.split('\n', 2)
+    if len(lines) > 1:
+        stripped = lines[1].lstrip(' ')
+        if stripped:
+            indent = len(lines[1]) - len(stripped) or 4
+
+    return indent, raw.endswith('\n')
+
+def save_flows(filepath, flows, indent=4, trailing_newline=False):
+    """Sparar flows till JSON-fil"""
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(flows, f, indent=indent, ensure_ascii=False)
+        if trailing_newline:
+            f.write('\n')
+
+def index_nodes(flows):
+    """Indexerar noder på id - O(n)"""
+    return {n['id']: n for n in flows if isinstance(n, dict) and 'id' in n}
+
+# ============================================================================
+# TEXTMERGE (diff3)
+# ============================================================================
+
+def _hunks(base, other):
+    """Returnerar ändrade block som (base_start, base_end, ersättningsrader)"""
+    matcher = difflib.SequenceMatcher(None, base, other, autojunk=False)
+    return [
+        (i1, i2, other[j1:j2])
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+def merge_text(base, local, upstream):
+    """Trevägsmerge av text rad för rad
+
+    Returnerar den mergade texten, eller None om local och upstream ändrat
+    överlappande rader på olika sätt.
+    """
+    base_lines = base.splitlines(keepends=True)
+    local_hunks = _hunks(base_lines, local.splitlines(keepends=True))
+    upstream_hunks = _hunks(base_lines, upstream.splitlines(keepends=True))
+
+    result = []
+    pos = 0
+    li = ui = 0
+
+    while li < len(local_hunks) or ui < len(upstream_hunks):
+        # Ta nästa block i base-ordning och samla allt som överlappar det
+        if ui >= len(upstream_hunks) or (
+                li < len(local_hunks) and local_hunks[li][0] <= upstream_hunks[ui][0]):
+            start, end = local_hunks[li][0], local_hunks[li][1]
+        else:
+            start, end = upstream_hunks[ui][0], upstream_hunks[ui][1]
+
+        group_local, group_upstream = [], []
+        changed = True
+        while changed:
+            changed = False
+            while li < len(local_hunks) and _overlaps(local_hunks[li], start, end):
+                group_local.append(local_hunks[li])
+                end = max(end, local_hunks[li][1])
+                li += 1
+                changed = True
+            while ui < len(upstream_hunks) and _overlaps(upstream_hunks[ui], start, end):
+                group_upstream.append(upstream_hunks[ui])
+                end = max(end, upstream_hunks[ui][1])
+                ui += 1
+                changed = True
+
+        result.extend(base_lines[pos:start])
+
+        if group_local and group_upstream:
+            local_text = _apply(base_lines, start, end, group_local)
+            upstream_text = _apply(base_lines, start, end, group_upstream)
+            if local_text != upstream_text:
+                return None
+            result.extend(local_text)
+        else:
+            result.extend(_apply(base_lines, start, end, group_local or group_upstream))
+
+        pos = end
+
+    result.extend(base_lines[pos:])
+    return ''.join(result)
+
+def _overlaps(hunk, start, end):
+    """Block överlappar (eller nuddar, vid ren insättning) området start:end"""
+    h_start, h_end = hunk[0], hunk[1]
+    if h_start == h_end or start == end:
+        return start <= h_start <= end
+    return h_start < end
+
+def _apply(base_lines, start, end, hunks):
+    """Applicerar en sides block på base_lines[start:end]"""
+    out = []
+    pos = start
+    for h_start, h_end, lines in hunks:
+        out.extend(base_lines[pos:h_start])
+        out.extend(lines)
+        pos = h_end
+    out.extend(base_lines[pos:end])
+    return out
+
+# ============================================================================
+# WIRES
+# ============================================================================
+
+def merge_wires(base, local, upstream):
+    """Mergar wires per utgång
+
+    Kopplingar som lagts till på någon sida behålls, kopplingar som tagits
+    bort på någon sida tas bort. Ordningen följer local.
+    """
+    base = base if isinstance(base, list) else []
+    local = local if isinstance(local, list) else []
+    upstream = upstream if isinstance(upstream, list) else []
+
+    merged = []
+    for port in range(max(len(local), len(upstream))):
+        b = base[port] if port < len(base) else []
+        l = local[port] if port < len(local) else []
+        u = upstream[port] if port < len(upstream) else []
+
+        b_set, l_set, u_set = set(b), set(l), set(u)
+        removed = (b_set - l_set) | (b_set - u_set)
+
+        port_wires = [t for t in l if t not in removed]
+        seen = set(port_wires)
+        for t in u:
+            if t not in seen and t not in removed:
+                port_wires.append(t)
+                seen.add(t)
+        merged.append(port_wires)
+
+    return merged
+
+def clamp_wires(merged, node, report):
+    """Anpassar wires till mergade outputs
+
+    Har ena sidan tagit bort en utgång och den andra kopplat den får noden
+    inte fler portar än outputs; borttappade kopplingar blir en konflikt.
+    """
+    outputs = merged.get('outputs')
+    wires = merged.get('wires')
+    if not isinstance(outputs, int) or isinstance(outputs, bool) or not isinstance(wires, list):
+        return
+
+    if len(wires) > outputs:
+        if any(wires[outputs:]):
+            report.conflict(node, 'wires', 'outputs')
+        merged['wires'] = wires[:outputs]
+
+# ============================================================================
+# NODMERGE
+# ============================================================================
+
+class MergeReport:
+    """Samlar statistik, konflikter och automatiska lösningar"""
+
+    def __init__(self, prefer):
+        self.prefer = prefer
+        self.summary = {
+            'unchanged': 0,
+            'taken_local': 0,
+            'taken_upstream': 0,
+            'merged': 0,
+            'added_local': 0,
+            'added_upstream': 0,
+            'deleted': 0,
+            'conflicts': 0,
+            'auto_resolved': 0
+        }
+        self.conflicts = []
+        self.auto_resolved = []
+
+    def conflict(self, node, field, kind):
+        self.summary['conflicts'] += 1
+        self.conflicts.append({
+            'id': node.get('id'),
+            'type': node.get('type'),
+            'name': node.get('name') or node.get('label') or '',
+            'field': field,
+            'kind': kind,
+            'resolution': self.prefer
+        })
+
+    def auto(self, node, field, rule):
+        self.summary['auto_resolved'] += 1
+        self.auto_resolved.append({
+            'id': node.get('id'),
+            'type': node.get('type'),
+            'name': node.get('name') or node.get('label') or '',
+            'field': field,
+            'rule': rule
+        })
+
+    def to_dict(self):
+        return {
+            'prefer': self.prefer,
+            'summary': self.summary,
+            'conflicts': self.conflicts,
+            'autoResolved': self.auto_resolved
+        }
+
+def merge_node(base, local, upstream, report):
+    """Mergar en nod som finns i både local och upstream, fält för fält"""
+    base = base or {}
+    merged = {}
+
+    keys = list(local.keys())
+    keys.extend(k for k in upstream.keys() if k not in local)
+
+    for key in keys:
+        bv = base.get(key, MISSING)
+        lv = local.get(key, MISSING)
+        uv = upstream.get(key, MISSING)
+
+        if key in LOCAL_WINS_FIELDS and lv is not MISSING:
+            # Layouten är site-specifik, även när bara upstream flyttat noden
+            value = lv
+            if uv != lv and uv != bv:
+                report.auto(local, key, 'local-layout')
+        elif lv == uv or uv == bv:
+            value = lv
+        elif lv == bv:
+            value = uv
+        elif key == 'wires':
+            value = merge_wires(bv, lv, uv)
+            report.auto(local, key, 'wires-union')
+        elif key in TEXT_FIELDS and all(isinstance(v, str) for v in (bv, lv, uv)):
+            value = merge_text(bv, lv, uv)
+            if value is None:
+                value = lv if report.prefer == 'local' else uv
+                report.conflict(local, key, 'text')
+            else:
+                report.auto(local, key, 'diff3')
+        else:
+            value = lv if report.prefer == 'local' else uv
+            report.conflict(local, key, 'field')
+
+        if value is not MISSING:
+            merged[key] = value
+
+    clamp_wires(merged, local, report)
+    return merged
+
+def merge_flows(base_flows, local_flows, upstream_flows, prefer='local'):
+    """Trevägsmerge av tre flödeslistor
+
+    Returnerar (mergade flöden, MergeReport). Ordningen följer local, med
+    noder som bara finns i upstream sist i upstreams ordning.
+    """
+    report = MergeReport(prefer)
+    base = index_nodes(base_flows)
+    local = index_nodes(local_flows)
+    upstream = index_nodes(upstream_flows)
+
+    merged = []
+
+    for node in local_flows:
+        node_id = node.get('id') if isinstance(node, dict) else None
+        if node_id is None:
+            merged.append(node)
+            continue
+
+        b = base.get(node_id)
+        u = upstream.get(node_id)
+
+        if u is None:
+            if b is None:
+                # Lokalt tillagd
+                merged.append(node)
+                report.summary['added_local'] += 1
+            elif node == b:
+                # Borttagen i upstream, orörd lokalt
+                report.summary['deleted'] += 1
+            else:
+                report.conflict(node, None, 'modify-delete')
+                if prefer == 'local':
+                    merged.append(node)
+            continue
+
+        if node == u:
+            merged.append(node)
+            report.summary['unchanged'] += 1
+        elif b is not None and node == b:
+            merged.append(u)
+            report.summary['taken_upstream'] += 1
+        elif b is not None and u == b:
+            merged.append(node)
+            report.summary['taken_local'] += 1
+        else:
+            merged.append(merge_node(b, node, u, report))
+            report.summary['merged'] += 1
+
+    for node in upstream_flows:
+        node_id = node.get('id') if isinstance(node, dict) else None
+        if node_id is None or node_id in local:
+            continue
+
+        b = base.get(node_id)
+        if b is None:
+            merged.append(node)
+            report.summary['added_upstream'] += 1
+        elif node == b:
+            # Borttagen lokalt, orörd i upstream
+            report.summary['deleted'] += 1
+        else:
+            report.conflict(node, None, 'delete-modify')
+            if prefer == 'upstream':
+                merged.append(node)
+
+    return merged, report
+
+def main():
+    parser = argparse.ArgumentParser(description='Trevägsmerge av Node-RED flödesfiler')
+    parser.add_argument('base', help='Senast utrullade flöde')
+    parser.add_argument('local', help='Sitens nuvarande flöde')
+    parser.add_argument('upstream', help='Nytt flöde att rulla ut')
+    parser.add_argument('-o', '--output', help='Mergat flöde (standard: skriv över local)')
+    parser.add_argument('--report', help='Skriv konfliktrapport som JSON')
+    parser.add_argument('--prefer', choices=('local', 'upstream'), default='local',
+                        help='Vilken sida som vinner vid konflikt (standard: local)')
+    args = parser.parse_args()
+
+    try:
+        base_flows = load_flows(args.base)
+        local_flows = load_flows(args.local)
+        upstream_flows = load_flows(args.upstream)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"❌ Kunde inte läsa flöden: {e}")
+        return 2
+
+    merged, report = merge_flows(base_flows, local_flows, upstream_flows, args.prefer)
+
+    output = args.output or args.local
+    indent, trailing_newline = detect_format(args.local)
+    save_flows(output, merged, indent, trailing_newline)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
+
+    s = report.summary
+    print(f"🔀 Mergade {len(merged)} noder → {output}")
+    print(f"   = {s['unchanged']} oförändrade, ← {s['taken_local']} local, → {s['taken_upstream']} upstream, "
+          f"⇄ {s['merged']} fältmergade")
+    print(f"   ➕ {s['added_local']} lokalt tillagda, {s['added_upstream']} nya från upstream, "
+          f"➖ {s['deleted']} borttagna")
+    print(f"   🤖 {s['auto_resolved']} automatiskt lösta")
+
+    if report.conflicts:
+        print(f"⚠️ {len(report.conflicts)} konflikter (löst till förmån för {args.prefer}):")
+        for c in report.conflicts:
+            field = f".{c['field']}" if c['field'] else ''
+            print(f"   - {c['id']}{field} [{c['kind']}] {c['name']}")
+        return 1
+
+    print("✅ Inga konflikter")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
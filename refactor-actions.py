@@ -10,19 +10,76 @@ Skapar:
 2. Uppdaterar ui-button noder att sätta msg.action/msg.group
 3. Lägger till Action Router switch-nod som best practice
 4. Städar befintliga function-noder för konsekvent syntax
+5. Lägger in Payload Diff-noder så att widgets bara får förändrade rader
 
 Av: Claude Opus 4.5 för Reflink OS
 """
 
+import sys
 import json
 import copy
 import uuid
+import hashlib
 from datetime import datetime
 
 def generate_id():
     """Genererar ett unikt Node-RED ID"""
     return uuid.uuid4().hex[:16]
 
+class NodeIdAllocator:
+    """Delar ut Node-RED ID:n utan kollisioner mot befintliga noder
+    
+    Alla befintliga ID:n läses in i ett set en gång; varje allokering är
+    sedan O(1). I deterministiskt läge härleds ID:t ur nodens innehåll
+    (allt utom "id"), så att omkörningar ger byte-identisk output och
+    Node-RED bara deployar om noder som faktiskt ändrats.
+    """
+    
+    def __init__(self, existing_ids=(), deterministic=True, seed='', length=8):
+        self.used = set(existing_ids)
+        self.deterministic = deterministic
+        self.seed = seed
+        self.length = length
+    
+    @classmethod
+    def from_flows(cls, flows, **kwargs):
+        """Skapar en allokator med alla ID:n i flows som upptagna"""
+        return cls((n['id'] for n in flows if 'id' in n), **kwargs)
+    
+    def _candidate(self, prefix, key, attempt):
+        if not self.deterministic:
+            return f"{prefix}-{generate_id()[:self.length]}"
+        
+        material = f"{self.seed}\0{prefix}\0{key}\0{attempt}"
+        digest = hashlib.sha1(material.encode('utf-8')).hexdigest()
+        return f"{prefix}-{digest[:self.length]}"
+    
+    def allocate(self, prefix, key=''):
+        """Reserverar ett ledigt ID på formen <prefix>-<hex>
+        
+        Vid kollision provas nästa kandidat; i deterministiskt läge genom
+        att räkna upp ett salt, så att resultatet ändå är reproducerbart.
+        """
+        attempt = 0
+        candidate = self._candidate(prefix, key, attempt)
+        while candidate in self.used:
+            attempt += 1
+            candidate = self._candidate(prefix, key, attempt)
+        
+        self.used.add(candidate)
+        return candidate
+    
+    def allocate_many(self, prefix, keys):
+        """Reserverar ett ID per nyckel i keys, i samma ordning"""
+        return [self.allocate(prefix, key) for key in keys]
+    
+    def assign(self, node, prefix):
+        """Sätter node["id"] utifrån nodens innehåll och returnerar noden"""
+        content = {k: v for k, v in node.items() if k != 'id'}
+        key = json.dumps(content, sort_keys=True, ensure_ascii=False)
+        node['id'] = self.allocate(prefix, key)
+        return node
+
 def load_flows(filepath):
     """Laddar flows från JSON-fil"""
     with open(filepath, 'r', encoding='utf-8') as f:
@@ -141,11 +198,20 @@ msg.group = msg.group || 'Controllers';
 // 📦 Hämta data från global context (med fallback)
 const controllers = global.get('reflink.regulators') || [];
 
+// 🗂️ Controller-index från profilmotorn - Kylar/Frysar är förberäknade
+// och uppdateras bara vid poll eller börvärdesskrivning
+const profileEngine = global.get('profileEngine');
+let index = global.get('controllerIndex', 'memory');
+if (!index && profileEngine) {
+    index = profileEngine.buildControllerIndex(controllers, global.get('modbusProfiles') || {});
+    global.set('controllerIndex', index, 'memory');
+}
+
 // 🔄 Filtrera baserat på action
 let result = [];
 switch (msg.action) {
     case 'showKylar':
-        result = controllers.filter(c => {
+        result = index ? index.kylar : controllers.filter(c => {
             const sp = parseFloat((c.setpoint || '0').toString().replace(/[^0-9.-]/g, ''));
             return !isNaN(sp) && sp >= 0;
         });
@@ -153,13 +219,21 @@ switch (msg.action) {
         break;
         
     case 'showFrysar':
-        result = controllers.filter(c => {
+        result = index ? index.frysar : controllers.filter(c => {
             const sp = parseFloat((c.setpoint || '0').toString().replace(/[^0-9.-]/g, ''));
             return !isNaN(sp) && sp < 0;
         });
         msg.group = 'Frysar';
         break;
         
+    case 'setSetpoint':
+        // payload: { controllerId, newSetpoint }
+        if (index && profileEngine && msg.payload && msg.payload.controllerId !== undefined) {
+            profileEngine.updateControllerSetpoint(index, msg.payload.controllerId, msg.payload.newSetpoint);
+        }
+        result = controllers;
+        break;
+        
     case 'showControllers':
     default:
         result = controllers;
@@ -264,10 +338,275 @@ node.status({ fill, shape: 'dot', text: `${alarms.active.length} larm` });
 
 return msg;'''
 
-def create_universal_safe_handler_node(flow_id, x=100, y=100):
+# ============================================================================
+# PAYLOAD DIFF - Delta-protokoll mellan function-noder och dashboard-widgets
+# ============================================================================
+
+# Function-noder vars utdata går via en Payload Diff-nod till widgeten
+DIFF_SOURCE_NAMES = (
+    'Maskiner',
+    'AK-cc kylar',
+    'AK-cc frysar',
+    'refboard enhets list Layout',
+    'refboard enhetsfrys list Layout'
+)
+
+# Fält som identifierar en rad (första som finns används)
+DIFF_KEY_FIELDS = ['id', 'deviceId', 'row', 'name', 'namn']
+
+# Skicka en full snapshot var N:e utskick så att nya klienter synkas
+DIFF_FULL_EVERY = 20
+
+# Läge per widget: 'delta' = msg.payload blir en patch (ui-templates med
+# PAYLOAD_PATCH_TEMPLATE), 'full' = hela listan/värdet skickas men bara när
+# något ändrats (ui-gauge, ui-table med autocols/append). ui-tables med
+# fasta kolumner och action 'replace' byts mot en patch-template.
+
+PAYLOAD_DIFF_MARKER = 'PAYLOAD DIFF - Reflink Delta Protocol'
+
+PAYLOAD_DIFF_FUNC = '''// ═══════════════════════════════════════════════════════════════════════════
+// PAYLOAD DIFF - Reflink Delta Protocol v1.0
+// ═══════════════════════════════════════════════════════════════════════════
+// Genererad av refactor-actions.py - redigera inte för hand
+// Sparar senaste snapshot per widget och skickar bara förändrade rader.
+//   full  = hela listan, men bara när något ändrats (ui-table, ui-gauge)
+//   delta = msg.payload = { type: 'delta', added, changed, removed, order }
+//           där added är [{ key, row }], changed är [{ key, set, unset }]
+//           (bara ändrade fält) och removed är nycklar
+
+const MODE = '__MODE__';
+const KEY_FIELDS = __KEY_FIELDS__;
+const FULL_EVERY = __FULL_EVERY__;
+
+// Snapshot i minnet - ska inte skrivas till disk eller överleva omstart
+const stored = context.get('snapshot', 'memory') || null;
+const force = msg.action === 'refresh' || msg.reset === true;
+const seq = stored && isFinite(stored.seq) ? stored.seq + 1 : 0;
+
+function isPlainObject(v) {
+    return v !== null && typeof v === 'object' && !Array.isArray(v);
+}
+
+// Bara fälten som ändrats - en tabellrad där bara temperaturen ändrats
+// skickar inte om namn och status
+function fieldPatch(key, before, after) {
+    if (!isPlainObject(before) || !isPlainObject(after)) return { key: key, row: after };
+    const set = {};
+    const unset = [];
+    for (const f of Object.keys(after)) {
+        if (JSON.stringify(before[f]) !== JSON.stringify(after[f])) set[f] = after[f];
+    }
+    for (const f of Object.keys(before)) {
+        if (!(f in after)) unset.push(f);
+    }
+    return unset.length ? { key: key, set: set, unset: unset } : { key: key, set: set };
+}
+
+function rowKey(row, idx) {
+    if (row && typeof row === 'object') {
+        for (const k of KEY_FIELDS) {
+            if (row[k] !== undefined && row[k] !== null) return String(row[k]);
+        }
+    }
+    return '#' + idx;
+}
+
+// 🔄 REFRESH utan data (t.ex. från en ui-template som missat en patch) -
+// skicka senaste snapshot igen som full
+if (msg.action === 'refresh' && msg.payload === undefined) {
+    if (!stored) return null;
+    if (stored.rows) {
+        const snapshotRows = stored.order.map(key => JSON.parse(stored.rows[key]));
+        msg.payload = MODE === 'delta'
+            ? { type: 'full', seq: stored.seq, order: stored.order, rows: snapshotRows }
+            : snapshotRows;
+    } else {
+        msg.payload = JSON.parse(stored.value);
+    }
+    return msg;
+}
+
+// 🔢 SKALÄR (t.ex. gauge-värde) - släpp igenom bara vid ändring
+if (!Array.isArray(msg.payload)) {
+    const value = JSON.stringify(msg.payload === undefined ? null : msg.payload);
+    if (!force && stored && stored.value === value) {
+        return null;
+    }
+    context.set('snapshot', { value: value, seq: seq }, 'memory');
+    return msg;
+}
+
+// 📋 LISTA - jämför rad för rad på nyckel. En skalär snapshot räknas
+// som ingen snapshot, så att första listan alltid blir full
+const prev = stored && stored.rows ? stored : null;
+const rows = {};
+const order = [];
+const added = [];
+const changed = [];
+
+msg.payload.forEach((row, idx) => {
+    // Dubblettnycklar får positionen som suffix så att ingen rad skrivs över
+    let key = rowKey(row, idx);
+    if (key in rows) key += '#' + idx;
+    const json = JSON.stringify(row);
+    rows[key] = json;
+    order.push(key);
+
+    if (!prev || !(key in prev.rows)) {
+        added.push({ key: key, row: row });
+    } else if (prev.rows[key] !== json) {
+        changed.push(MODE === 'delta' ? fieldPatch(key, JSON.parse(prev.rows[key]), row) : { key: key });
+    }
+});
+
+const removed = prev ? prev.order.filter(key => !(key in rows)) : [];
+const orderChanged = !prev || JSON.stringify(prev.order) !== JSON.stringify(order);
+
+if (!force && prev && added.length === 0 && changed.length === 0 && removed.length === 0 && !orderChanged) {
+    node.status({ fill: 'grey', shape: 'ring', text: `oförändrad (${order.length})` });
+    return null;
+}
+
+context.set('snapshot', { rows: rows, order: order, seq: seq }, 'memory');
+
+if (MODE === 'delta') {
+    if (force || !prev || seq % FULL_EVERY === 0) {
+        msg.payload = { type: 'full', seq: seq, order: order, rows: msg.payload };
+    } else {
+        msg.payload = {
+            type: 'delta',
+            seq: seq,
+            base: prev.seq,
+            added: added,
+            changed: changed,
+            removed: removed,
+            order: orderChanged ? order : undefined
+        };
+    }
+}
+
+node.status({
+    fill: 'green',
+    shape: 'dot',
+    text: `+${added.length} ~${changed.length} -${removed.length}`
+});
+
+return msg;'''
+
+# Markör i ui-templates som kan applicera patchar - bara de får delta-läget
+PAYLOAD_PATCH_MARKER = 'REFLINK PAYLOAD PATCH'
+
+# Vue-kod för en ui-template som tar emot delta-läget ovan. Templatens
+# utgång kopplas tillbaka till diff-noden, och den ber om en full snapshot
+# när den missat en patch - t.ex. när Dashboard 2 spelar upp senaste
+# meddelandet (en delta) för en kiosk som just startat om.
+# __COLUMNS__ ersätts med tabellens kolumner [{ title, key }].
+PAYLOAD_PATCH_TEMPLATE = '''<template>
+  <v-table density="compact">
+    <thead>
+      <tr>
+        <th v-for="c in columns" :key="c.key">{{ c.title }}</th>
+      </tr>
+    </thead>
+    <tbody>
+      <tr v-for="key in order" :key="key">
+        <td v-for="c in columns" :key="c.key">{{ rows[key][c.key] }}</td>
+      </tr>
+    </tbody>
+  </v-table>
+</template>
+
+<script>
+// REFLINK PAYLOAD PATCH - applicerar patchar från en Payload Diff-nod
+export default {
+  data() {
+    return { columns: __COLUMNS__, rows: {}, order: [], seq: -1 };
+  },
+  watch: {
+    // immediate: Dashboard 2 spelar upp senaste meddelandet vid anslutning
+    msg: {
+      immediate: true,
+      handler: function (m) {
+        if (m && m.payload && m.payload.type) this.applyPatch(m.payload);
+      }
+    }
+  },
+  methods: {
+    applyPatch(p) {
+      if (p.type === 'full') {
+        const rows = {};
+        p.order.forEach((key, idx) => { rows[key] = p.rows[idx]; });
+        this.rows = rows;
+        this.order = p.order;
+        this.seq = p.seq;
+        return;
+      }
+      // Missad patch - be diff-noden om en full snapshot
+      if (p.base !== this.seq) {
+        this.send({ action: 'refresh' });
+        return;
+      }
+
+      const rows = Object.assign({}, this.rows);
+      p.removed.forEach(key => { delete rows[key]; });
+      p.added.forEach(item => { rows[item.key] = item.row; });
+      p.changed.forEach(item => {
+        if (item.row !== undefined) {
+          rows[item.key] = item.row;
+          return;
+        }
+        const row = Object.assign({}, rows[item.key], item.set);
+        (item.unset || []).forEach(f => { delete row[f]; });
+        rows[item.key] = row;
+      });
+      this.rows = rows;
+      if (p.order) this.order = p.order;
+      this.seq = p.seq;
+    }
+  }
+};
+</script>'''
+
+def create_payload_patch_format(columns):
+    """Vue-koden för en patch-template med ui-tablens kolumner"""
+    cols = [{"title": c.get('title', c['key']), "key": c['key']} for c in columns]
+    return PAYLOAD_PATCH_TEMPLATE.replace('__COLUMNS__', json.dumps(cols, ensure_ascii=False))
+
+def can_patch_table(node):
+    """ui-tables med fasta kolumner som ersätts helt vid varje meddelande"""
+    return (node.get('type') == 'ui-table'
+            and bool(node.get('columns'))
+            and not node.get('autocols')
+            and node.get('action', 'replace') == 'replace')
+
+def convert_table_to_patch_template(node):
+    """Byter en ui-table mot en ui-template som applicerar patchar
+
+    Id, grupp, placering och kopplingar behålls, så länge flödet pekar på
+    samma nod. Sökfältet i ui-table försvinner.
+    """
+    format_ = create_payload_patch_format(node['columns'])
+    for key in ('label', 'maxrows', 'passthru', 'autocols', 'showSearch', 'deselect',
+                'selectionType', 'columns', 'mobileBreakpoint', 'mobileBreakpointType', 'action'):
+        node.pop(key, None)
+    node.update({
+        "type": "ui-template",
+        "page": "",
+        "ui": "",
+        "head": "",
+        "format": format_,
+        "storeOutMessages": True,
+        "passthru": False,
+        "resendOnRefresh": True,
+        "templateScope": "local"
+    })
+    return node
+
+def create_universal_safe_handler_node(flow_id, x=100, y=100, ids=None):
     """Skapar Universal Safe Handler function-nod"""
-    return {
-        "id": f"safe-handler-{generate_id()[:8]}",
+    ids = ids or NodeIdAllocator()
+    return ids.assign({
+        "id": None,
         "type": "function",
         "z": flow_id,
         "name": "🛡️ Universal Safe Handler",
@@ -281,12 +620,13 @@ def create_universal_safe_handler_node(flow_id, x=100, y=100):
         "x": x,
         "y": y,
         "wires": [[]]
-    }
+    }, "safe-handler")
 
-def create_action_router_node(flow_id, x=300, y=100):
+def create_action_router_node(flow_id, x=300, y=100, ids=None):
     """Skapar Action Router switch-nod"""
-    return {
-        "id": f"action-router-{generate_id()[:8]}",
+    ids = ids or NodeIdAllocator()
+    return ids.assign({
+        "id": None,
         "type": "switch",
         "z": flow_id,
         "name": "🔀 Action Router",
@@ -299,15 +639,16 @@ def create_action_router_node(flow_id, x=300, y=100):
         "x": x,
         "y": y,
         "wires": [[] for _ in ACTION_ROUTER_CONFIG["rules"]]
-    }
+    }, "action-router")
 
-def create_best_practice_example_nodes(flow_id, start_x=100, start_y=300):
+def create_best_practice_example_nodes(flow_id, start_x=100, start_y=300, ids=None):
     """Skapar best practice example function-noder"""
+    ids = ids or NodeIdAllocator()
     nodes = []
     
     # Controllers example
-    nodes.append({
-        "id": f"bp-controllers-{generate_id()[:8]}",
+    nodes.append(ids.assign({
+        "id": None,
         "type": "function",
         "z": flow_id,
         "name": "📘 Best Practice: Controllers",
@@ -321,11 +662,11 @@ def create_best_practice_example_nodes(flow_id, start_x=100, start_y=300):
         "x": start_x,
         "y": start_y,
         "wires": [[]]
-    })
+    }, "bp-controllers"))
     
     # Machines example
-    nodes.append({
-        "id": f"bp-machines-{generate_id()[:8]}",
+    nodes.append(ids.assign({
+        "id": None,
         "type": "function",
         "z": flow_id,
         "name": "📘 Best Practice: Machines",
@@ -339,11 +680,11 @@ def create_best_practice_example_nodes(flow_id, start_x=100, start_y=300):
         "x": start_x,
         "y": start_y + 80,
         "wires": [[]]
-    })
+    }, "bp-machines"))
     
     # Alarms example
-    nodes.append({
-        "id": f"bp-alarms-{generate_id()[:8]}",
+    nodes.append(ids.assign({
+        "id": None,
         "type": "function",
         "z": flow_id,
         "name": "📘 Best Practice: Alarms",
@@ -357,7 +698,7 @@ def create_best_practice_example_nodes(flow_id, start_x=100, start_y=300):
         "x": start_x,
         "y": start_y + 160,
         "wires": [[]]
-    })
+    }, "bp-alarms"))
     
     return nodes
 
@@ -415,6 +756,10 @@ def add_safe_header_to_function(node):
     if '🛡️ SAFE HEADER' in func or 'SAFE HEADER' in func:
         return node  # Redan uppdaterad
     
+    # Genererade Payload Diff-noder ska inte ändra msg.action/msg.group
+    if is_payload_diff_node(node):
+        return node
+    
     # Försök identifiera lämplig action/group från nodnamn
     name = node.get('name', '').lower()
     
@@ -470,10 +815,86 @@ msg.group = msg.group || '{group}';
     
     return node
 
-def create_reflink_standards_comment_node(flow_id, x=100, y=50):
+def create_payload_diff_node(flow_id, target_id, mode='full', x=400, y=100, ids=None):
+    """Skapar en Payload Diff function-nod som skickar vidare till target_id"""
+    ids = ids or NodeIdAllocator()
+    func = (PAYLOAD_DIFF_FUNC
+            .replace('__MODE__', mode)
+            .replace('__KEY_FIELDS__', json.dumps(DIFF_KEY_FIELDS))
+            .replace('__FULL_EVERY__', str(DIFF_FULL_EVERY)))
+    
+    return ids.assign({
+        "id": None,
+        "type": "function",
+        "z": flow_id,
+        "name": f"🧮 Payload Diff ({mode})",
+        "func": func,
+        "outputs": 1,
+        "timeout": 0,
+        "noerr": 0,
+        "initialize": "",
+        "finalize": "",
+        "libs": [],
+        "x": x,
+        "y": y,
+        "wires": [[target_id]]
+    }, "payload-diff")
+
+def is_payload_diff_node(node):
+    """Kontrollerar om noden är en genererad Payload Diff-nod"""
+    return node.get('type') == 'function' and PAYLOAD_DIFF_MARKER in node.get('func', '')
+
+def insert_payload_diff_nodes(flows, ids=None):
+    """Lägger in Payload Diff-noder mellan DIFF_SOURCE_NAMES och deras widgets
+    
+    Varje widget-koppling får en egen diff-nod så att snapshoten hålls per
+    widget. Kopplingar som redan går via en diff-nod lämnas orörda.
+    ui-tables som kan patchas (can_patch_table) byts mot en patch-template
+    och får delta-läget; templatens utgång kopplas tillbaka till diff-noden
+    för refresh-förfrågningar. Övriga widgets får full-läget.
+    """
+    by_id = {n['id']: n for n in flows if 'id' in n}
+    ids = ids or NodeIdAllocator(by_id.keys())
+    new_nodes = []
+    
+    for node in flows:
+        if node.get('type') != 'function' or node.get('name') not in DIFF_SOURCE_NAMES:
+            continue
+        
+        for port, targets in enumerate(node.get('wires', [])):
+            for t_idx, target_id in enumerate(targets):
+                target = by_id.get(target_id)
+                if target is None or not target.get('type', '').startswith('ui'):
+                    continue
+                
+                if can_patch_table(target):
+                    convert_table_to_patch_template(target)
+                    print(f"  🔁 {target.get('name') or target['id']}: ui-table → patch-template")
+                mode = 'delta' if PAYLOAD_PATCH_MARKER in target.get('format', '') else 'full'
+                diff_node = create_payload_diff_node(
+                    node.get('z', target.get('z')),
+                    target_id,
+                    mode,
+                    x=(node.get('x', 0) + target.get('x', 0)) // 2,
+                    y=target.get('y', node.get('y', 0)),
+                    ids=ids
+                )
+                node['wires'][port][t_idx] = diff_node['id']
+                if mode == 'delta':
+                    if not target.get('wires'):
+                        target['wires'] = [[]]
+                    target['wires'][0].append(diff_node['id'])
+                new_nodes.append(diff_node)
+                print(f"  🧮 Payload Diff ({mode}): {node.get('name')} → {target.get('name') or target['type']}")
+    
+    flows.extend(new_nodes)
+    return len(new_nodes)
+
+def create_reflink_standards_comment_node(flow_id, x=100, y=50, ids=None):
     """Skapar en comment-nod med dokumentation för Reflink Message Standard"""
-    return {
-        "id": f"reflink-std-doc-{generate_id()[:8]}",
+    ids = ids or NodeIdAllocator()
+    return ids.assign({
+        "id": None,
         "type": "comment",
         "z": flow_id,
         "name": "📚 REFLINK MESSAGE STANDARD v1.0",
@@ -532,11 +953,12 @@ msg.group = msg.group || 'Controllers';
         "x": x,
         "y": y,
         "wires": []
-    }
+    }, "reflink-std-doc")
 
-def create_examples_flow():
+def create_examples_flow(ids=None):
     """Skapar ett helt nytt flow med best practice exempel"""
     flow_id = "reflink-examples-flow"
+    ids = ids or NodeIdAllocator()
     
     nodes = [
         # Flow tab
@@ -549,20 +971,20 @@ def create_examples_flow():
         },
         
         # Documentation
-        create_reflink_standards_comment_node(flow_id, 100, 50),
+        create_reflink_standards_comment_node(flow_id, 100, 50, ids),
         
         # Universal Safe Handler
-        create_universal_safe_handler_node(flow_id, 100, 150),
+        create_universal_safe_handler_node(flow_id, 100, 150, ids),
         
         # Action Router
-        create_action_router_node(flow_id, 350, 150),
+        create_action_router_node(flow_id, 350, 150, ids),
         
         # Best Practice Examples
-        *create_best_practice_example_nodes(flow_id, 100, 300),
+        *create_best_practice_example_nodes(flow_id, 100, 300, ids),
         
         # Example inject nodes
-        {
-            "id": f"inject-controllers-{generate_id()[:8]}",
+        ids.assign({
+            "id": None,
             "type": "inject",
             "z": flow_id,
             "name": "Show Controllers",
@@ -579,9 +1001,9 @@ def create_examples_flow():
             "x": 130,
             "y": 500,
             "wires": [[]]
-        },
-        {
-            "id": f"inject-machines-{generate_id()[:8]}",
+        }, "inject-controllers"),
+        ids.assign({
+            "id": None,
             "type": "inject",
             "z": flow_id,
             "name": "Show Machines",
@@ -598,9 +1020,9 @@ def create_examples_flow():
             "x": 130,
             "y": 550,
             "wires": [[]]
-        },
-        {
-            "id": f"inject-alarms-{generate_id()[:8]}",
+        }, "inject-machines"),
+        ids.assign({
+            "id": None,
             "type": "inject",
             "z": flow_id,
             "name": "Show Alarms",
@@ -617,16 +1039,19 @@ def create_examples_flow():
             "x": 130,
             "y": 600,
             "wires": [[]]
-        }
+        }, "inject-alarms")
     ]
     
     return nodes
 
-def refactor_flows(filepath):
+def refactor_flows(filepath, deterministic_ids=True):
     """Huvudfunktion som refaktorerar alla flows i en fil"""
     print(f"📂 Laddar {filepath}...")
     flows = load_flows(filepath)
     
+    # Alla befintliga ID:n läses in en gång - nya noder krockar aldrig
+    ids = NodeIdAllocator.from_flows(flows, deterministic=deterministic_ids)
+    
     modified_count = 0
     
     for i, node in enumerate(flows):
@@ -649,10 +1074,16 @@ def refactor_flows(filepath):
     # Lägg till examples flow om det inte redan finns
     has_examples = any(n.get('id') == 'reflink-examples-flow' for n in flows)
     if not has_examples:
-        examples = create_examples_flow()
+        examples = create_examples_flow(ids)
         flows.extend(examples)
         print(f"  ➕ Lade till Reflink Examples flow med {len(examples)} noder")
     
+    # Skicka bara förändringar till dashboard-widgets
+    diff_count = insert_payload_diff_nodes(flows, ids)
+    if diff_count:
+        modified_count += diff_count
+        print(f"  ➕ Lade till {diff_count} Payload Diff-noder")
+    
     # Spara
     save_flows(filepath, flows)
     print(f"✅ Sparade {filepath} ({modified_count} noder modifierade)")
@@ -672,11 +1103,14 @@ def main():
         '/root/.node-red/flows-alarms-stats.json'
     ]
     
+    # --random-ids ger slumpade ID:n istället för innehållsbaserade
+    deterministic_ids = '--random-ids' not in sys.argv[1:]
+    
     total_modified = 0
     
     for filepath in files:
         try:
-            count = refactor_flows(filepath)
+            count = refactor_flows(filepath, deterministic_ids)
             total_modified += count
         except FileNotFoundError:
             print(f"⚠️ Kunde inte hitta {filepath}, hoppar över...")
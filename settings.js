@@ -1,3 +1,48 @@
+// ===== UPPSTART =====
+// phases    = när varje fas var klar, ms sedan settings.js laddades
+// durations = hur lång tid ett steg tog (require av en modul, kiosken)
+// Function-noder når den via global.get('reflinkStartup').mark('fas').
+const reflinkStartup = {
+    startedAt: Date.now(),
+    phases: {},
+    durations: {},
+    mark: function(phase) {
+        if (this.phases[phase] === undefined) {
+            this.phases[phase] = Date.now() - this.startedAt;
+        }
+        return this.phases[phase];
+    }
+};
+
+// Laddar modulen först när en function-nod gör global.get(name)
+function lazyRequire(target, name, modulePath) {
+    let loaded;
+    Object.defineProperty(target, name, {
+        enumerable: true,
+        configurable: true,
+        get: function() {
+            if (loaded === undefined) {
+                const t0 = Date.now();
+                loaded = require(modulePath);
+                reflinkStartup.durations['require:' + name] = Date.now() - t0;
+                reflinkStartup.mark('require:' + name);
+            }
+            return loaded;
+        }
+    });
+    return target;
+}
+
+const functionGlobalContext = {
+    fs: require('fs'),
+    path: require('path'),
+    reflinkStartup: reflinkStartup
+};
+lazyRequire(functionGlobalContext, 'profileEngine', '/opt/reflink/lib/profile-engine');
+lazyRequire(functionGlobalContext, 'csvImporter', '/opt/reflink/lib/csv-importer');
+lazyRequire(functionGlobalContext, 'textUtils', '/opt/reflink/lib/text-utils');
+lazyRequire(functionGlobalContext, 'apiHandlers', '/opt/reflink/lib/api-handlers');
+
 module.exports = {
     // Porten Node-RED lyssnar på
     uiPort: process.env.PORT || 1880,
@@ -39,14 +84,8 @@ module.exports = {
     },
 
     // Global context - gör moduler tillgängliga i function-noder
-    functionGlobalContext: {
-        fs: require('fs'),
-        path: require('path'),
-        profileEngine: require('/opt/reflink/lib/profile-engine'),
-        csvImporter: require('/opt/reflink/lib/csv-importer'),
-        textUtils: require('/opt/reflink/lib/text-utils'),
-        apiHandlers: require('/opt/reflink/lib/api-handlers')
-    },
+    // (reflink-modulerna laddas lazy, se lazyRequire ovan)
+    functionGlobalContext: functionGlobalContext,
 
     // Tillåt externa moduler i function-noder
     functionExternalModules: true,
@@ -55,6 +94,10 @@ module.exports = {
     contextStorage: {
         default: {
             module: "localfilesystem"
+        },
+        // Flyktigt minne - t.ex. Payload Diff-snapshots som inte ska till disk
+        memory: {
+            module: "memory"
         }
     }
 };